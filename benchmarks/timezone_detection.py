@@ -0,0 +1,91 @@
+"""
+Микробенчмарк detect_timezone_from_time.
+
+Сравнивает индекс смещений с прежней реализацией, которая на каждый
+вызов вычисляла текущее смещение всех поясов pytz.
+
+    python benchmarks/timezone_detection.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import pytz
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.timezone_service import (  # noqa: E402
+    TimezoneOffsetIndex,
+    detect_timezone_from_time,
+    utc_now
+)
+
+POPULAR = [
+    ('Europe/Moscow', 'Москва'),
+    ('Europe/Kiev', 'Киев'),
+    ('Asia/Almaty', 'Алматы'),
+]
+
+
+def legacy_detect(user_time_str: str, popular_timezones=None):
+    """Сканирование всех поясов, как до индекса смещений"""
+    hour, minute = map(int, user_time_str.split(':'))
+    now = datetime.now(pytz.UTC)
+    diff_minutes = hour * 60 + minute - (now.hour * 60 + now.minute)
+    if diff_minutes > 12 * 60:
+        diff_minutes -= 24 * 60
+    elif diff_minutes < -12 * 60:
+        diff_minutes += 24 * 60
+    offset_hours = round(diff_minutes / 60)
+    for tz_name in [name for name, _ in popular_timezones or ()] + list(
+        pytz.all_timezones
+    ):
+        tz_offset = datetime.now(
+            pytz.timezone(tz_name)
+        ).utcoffset().total_seconds() / 3600
+        if abs(tz_offset - offset_hours) < 0.5:
+            return tz_name, ""
+    return None, ""
+
+
+def time_in(offset_minutes: int) -> str:
+    local = utc_now() + timedelta(minutes=offset_minutes)
+    return local.strftime('%H:%M')
+
+
+def report(name: str, func, number: int) -> None:
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{name:<40} {seconds * 1e6:10.1f} us")
+
+
+def main() -> None:
+    # Пояс без совпадения среди популярных - худший случай для скана
+    user_time = time_in(9 * 60)
+    detect_timezone_from_time(user_time, POPULAR)
+
+    report(
+        "legacy scan",
+        lambda: legacy_detect(user_time, POPULAR),
+        number=20
+    )
+    report(
+        "offset index",
+        lambda: detect_timezone_from_time(user_time, POPULAR),
+        number=10000
+    )
+    report(
+        "offset index, popular zone",
+        lambda: detect_timezone_from_time(time_in(180), POPULAR),
+        number=10000
+    )
+    report(
+        "index rebuild",
+        lambda: TimezoneOffsetIndex()._build(utc_now()),
+        number=3
+    )
+
+
+if __name__ == "__main__":
+    main()
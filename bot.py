@@ -1,11 +1,39 @@
 import asyncio
 from aiogram import Bot, Dispatcher
 
-from config import TOKEN
+from config import (
+    TOKEN,
+    SCHEDULER_MODE,
+    WRITE_BEHIND_ENABLED,
+    WRITE_BEHIND_MAX_ROWS,
+    WRITE_BEHIND_FLUSH_INTERVAL,
+    WRITE_BEHIND_MAX_ATTEMPTS
+)
 from database import init_session_maker
-from handlers import start, journal, goals, ratings, settings
-from services.scheduler import scheduler_loop
-from middleware import DatabaseCheckMiddleware, ErrorHandlerMiddleware
+from handlers import start, journal, goals, ratings, settings, export
+from repositories import (
+    BaseRepository,
+    GoalRepository,
+    UserRepository,
+    WriteBehindBuffer
+)
+from services.scheduler import (
+    scheduler_loop,
+    cleanup_loop,
+    ReminderSchedule
+)
+from services.reminder_timer import ReminderTimer
+from services.broadcast import BroadcastDispatcher
+from services.rating_coalescer import RatingCoalescer
+from services.analysis_queue import AnalysisQueue
+from services.mistral_client import init_mistral_client, close_mistral_client
+from services.llm_cache import init_llm_cache
+from services.partition_service import partition_maintenance_loop
+from middleware import (
+    DatabaseCheckMiddleware,
+    ErrorHandlerMiddleware,
+    DatabaseSessionMiddleware
+)
 
 
 async def main():
@@ -30,18 +58,84 @@ async def main():
     dp.message.middleware(ErrorHandlerMiddleware())
     dp.callback_query.middleware(ErrorHandlerMiddleware())
 
+    # Одна сессия и транзакция БД на апдейт
+    dp.message.middleware(DatabaseSessionMiddleware(session_maker))
+    dp.callback_query.middleware(DatabaseSessionMiddleware(session_maker))
+
+    # Общий клиент Mistral с пулом соединений
+    if init_mistral_client() is None:
+        print("MISTRAL_API_KEY не найден, AI-функции недоступны.")
+
+    # Ответы LLM кэшируются в памяти и, если есть БД, в таблице llm_cache
+    if session_maker:
+        init_llm_cache(session_maker)
+
+    # Оценки ответов AI пишутся в БД пачками
+    rating_coalescer = RatingCoalescer(session_maker)
+
+    # Анализ журнала выполняется фоновыми воркерами, а не в апдейте
+    analysis_queue = AnalysisQueue(bot, session_maker)
+
     # Регистрация всех обработчиков
     await start.register_start_handlers(dp, session_maker)
-    await journal.register_journal_handlers(dp, session_maker)
+    await journal.register_journal_handlers(
+        dp, session_maker, analysis_queue
+    )
     await goals.register_goals_handlers(dp, session_maker, bot)
-    await ratings.register_ratings_handlers(dp, session_maker)
+    await ratings.register_ratings_handlers(
+        dp, session_maker, rating_coalescer
+    )
     await settings.register_settings_handlers(dp, session_maker)
+    await export.register_export_handlers(dp, session_maker)
+
+    if session_maker:
+        asyncio.create_task(cleanup_loop(session_maker))
+        asyncio.create_task(partition_maintenance_loop(session_maker))
 
     # Запускаем планировщик в фоне
-    asyncio.create_task(scheduler_loop(bot, session_maker))
+    dispatcher = BroadcastDispatcher()
+    dispatcher.start()
+    if session_maker and SCHEDULER_MODE == "timer":
+        # Только для одного экземпляра бота, см. ReminderTimer
+        reminder_timer = ReminderTimer(bot, session_maker, dispatcher)
+        GoalRepository.add_listener(reminder_timer)
+        UserRepository.add_listener(reminder_timer)
+        await reminder_timer.rebuild()
+        asyncio.create_task(reminder_timer.run())
+    elif session_maker:
+        # Поддерживаем next_fire_at пользователей в актуальном состоянии
+        reminder_schedule = ReminderSchedule(session_maker)
+        GoalRepository.add_listener(reminder_schedule)
+        UserRepository.add_listener(reminder_schedule)
+        await reminder_schedule.schedule_missing()
+        asyncio.create_task(scheduler_loop(bot, session_maker, dispatcher))
+
+    # Пакетная запись журнала и ответов AI
+    write_buffer = None
+    if session_maker and WRITE_BEHIND_ENABLED:
+        write_buffer = WriteBehindBuffer(
+            session_maker,
+            max_rows=WRITE_BEHIND_MAX_ROWS,
+            flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+            max_attempts=WRITE_BEHIND_MAX_ATTEMPTS
+        )
+        BaseRepository.set_write_buffer(write_buffer)
+        write_buffer.start()
+    analysis_queue.start()
 
     # Запуск бота
-    await dp.start_polling(bot)
+    try:
+        # Сессию бота закрываем сами: после остановки polling
+        # еще досылаются напоминания из очереди рассылки
+        await dp.start_polling(bot, close_bot_session=False)
+    finally:
+        await analysis_queue.stop()
+        await dispatcher.drain()
+        await close_mistral_client()
+        await rating_coalescer.stop()
+        if write_buffer is not None:
+            await write_buffer.stop()
+        await bot.session.close()
 
 
 if __name__ == "__main__":
@@ -15,3 +15,97 @@ DB_HOST = os.getenv("DB_HOST")
 DB_NAME = os.getenv("DB_NAME")
 DB_PORT = os.getenv("DB_PORT")
 
+
+# Default timezone for users without a timezone set
+DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE", "Asia/Yekaterinburg")
+
+# Reminder scheduler mode: "poll" (DB polling, safe with several bot
+# instances) or "timer" (event-driven in-memory heap, single instance only:
+# goal and timezone changes made by another instance never reach the heap)
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "poll")
+
+# Reminder broadcast limits (Telegram: ~30 msg/s overall)
+BROADCAST_RATE_LIMIT = float(os.getenv("BROADCAST_RATE_LIMIT", "25"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+BROADCAST_SPREAD_SECONDS = float(os.getenv("BROADCAST_SPREAD_SECONDS", "30"))
+
+# Max users claimed by one scheduler instance per transaction
+REMINDER_CLAIM_BATCH = int(os.getenv("REMINDER_CLAIM_BATCH", "500"))
+
+# Reminders late by more than this (e.g. after downtime) are skipped
+REMINDER_MAX_LATENESS_SECONDS = int(
+    os.getenv("REMINDER_MAX_LATENESS_SECONDS", "1800")
+)
+
+# A queued reminder is leased for this long (sec). If delivery is not
+# confirmed by then (e.g. the process died), it is sent again, at most
+# REMINDER_MAX_ATTEMPTS times in total
+REMINDER_LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", "300"))
+REMINDER_MAX_ATTEMPTS = int(os.getenv("REMINDER_MAX_ATTEMPTS", "3"))
+
+# Batched (write-behind) inserts of journal entries, AI responses and analyses.
+# Off by default: buffered rows live only in process memory until a flush,
+# so a crash loses entries the user has already been told are saved
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "0") == "1"
+WRITE_BEHIND_MAX_ROWS = int(os.getenv("WRITE_BEHIND_MAX_ROWS", "200"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(
+    os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0")
+)
+# Flushes a row rejected by the DB is retried before it is dropped
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", "3"))
+
+# Rating button presses are coalesced and written once per window (sec)
+RATING_FLUSH_SECONDS = float(os.getenv("RATING_FLUSH_SECONDS", "2.0"))
+
+# Monthly partitions of journal_entries and ai_responses. There is no
+# DEFAULT partition: months are created this far ahead, so inserts keep
+# working even if the maintenance job has been down for a while
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "6"))
+# Partitions older than this are archived and dropped. Off by default
+# (0 - keep forever): dropped months disappear from /history and /export
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "0"))
+# Directory for gzipped JSONL archives of dropped partitions ("" - no archive)
+PARTITION_ARCHIVE_DIR = os.getenv("PARTITION_ARCHIVE_DIR", "archive")
+
+# /export: simultaneous exports and minimal interval per user (sec)
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "1"))
+EXPORT_COOLDOWN_SECONDS = int(os.getenv("EXPORT_COOLDOWN_SECONDS", "3600"))
+
+# Journal analysis trigger: entries needed for the first analysis,
+# new entries needed for a repeated one, pause between analyses (hours)
+# and age after which an analysis is refreshed even if triggers repeat
+ANALYSIS_MIN_ENTRIES = int(os.getenv("ANALYSIS_MIN_ENTRIES", "3"))
+ANALYSIS_MIN_NEW_ENTRIES = int(os.getenv("ANALYSIS_MIN_NEW_ENTRIES", "3"))
+ANALYSIS_COOLDOWN_HOURS = float(os.getenv("ANALYSIS_COOLDOWN_HOURS", "24"))
+ANALYSIS_MAX_AGE_DAYS = float(os.getenv("ANALYSIS_MAX_AGE_DAYS", "7"))
+
+# Background journal analyses: simultaneous LLM jobs, queued jobs limit
+# and hard time limit of one job (sec)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+ANALYSIS_QUEUE_SIZE = int(os.getenv("ANALYSIS_QUEUE_SIZE", "1000"))
+ANALYSIS_JOB_TIMEOUT_SECONDS = float(
+    os.getenv("ANALYSIS_JOB_TIMEOUT_SECONDS", "60")
+)
+
+# Streamed LLM answers: minimal interval between message edits (sec)
+STREAM_EDIT_INTERVAL_SECONDS = float(
+    os.getenv("STREAM_EDIT_INTERVAL_SECONDS", "1.0")
+)
+
+# Shared Mistral API client: request timeout, connect timeout (sec),
+# pooled connections and how long an idle connection is kept (sec)
+MISTRAL_TIMEOUT_SECONDS = float(os.getenv("MISTRAL_TIMEOUT_SECONDS", "60"))
+MISTRAL_CONNECT_TIMEOUT_SECONDS = float(
+    os.getenv("MISTRAL_CONNECT_TIMEOUT_SECONDS", "5")
+)
+MISTRAL_MAX_CONNECTIONS = int(os.getenv("MISTRAL_MAX_CONNECTIONS", "10"))
+MISTRAL_KEEPALIVE_SECONDS = float(os.getenv("MISTRAL_KEEPALIVE_SECONDS", "60"))
+
+# LLM response cache: in-process LRU size and TTL per feature (hours)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_TTL_CLARIFYING_HOURS = float(
+    os.getenv("LLM_CACHE_TTL_CLARIFYING_HOURS", "720")
+)
+LLM_CACHE_TTL_GOALS_ANALYSIS_HOURS = float(
+    os.getenv("LLM_CACHE_TTL_GOALS_ANALYSIS_HOURS", "168")
+)
@@ -0,0 +1,58 @@
+import os
+import tempfile
+from datetime import datetime
+
+from aiogram import types
+from aiogram.filters import Command
+
+from services.export_service import (
+    clear_export,
+    export_retry_after,
+    export_user_data,
+    mark_export_started
+)
+
+
+async def register_export_handlers(dp, session_maker):
+    """Регистрация обработчика выгрузки данных пользователя"""
+
+    @dp.message(Command("export"))
+    async def cmd_export(message: types.Message):
+        nonlocal session_maker
+        user_id = message.from_user.id
+        if not session_maker:
+            await message.answer("Ошибка: База данных не подключена.")
+            return
+
+        retry_after = export_retry_after(user_id)
+        if retry_after:
+            await message.answer(
+                f"Новую выгрузку можно запросить "
+                f"через {retry_after // 60 + 1} мин."
+            )
+            return
+        mark_export_started(user_id)
+
+        await message.answer("📦 Готовлю выгрузку твоих данных...")
+
+        file_name = f"export_{user_id}_{datetime.now():%Y%m%d}.jsonl.gz"
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, file_name)
+                rows_count = await export_user_data(
+                    session_maker, user_id, path
+                )
+                await message.answer_document(
+                    types.FSInputFile(path, filename=file_name),
+                    caption=(
+                        f"Твои данные: {rows_count} записей "
+                        f"(журнал, цели, анализы и ответы AI)."
+                    )
+                )
+        except Exception as e:
+            # Неудачная выгрузка не должна блокировать повторную попытку
+            clear_export(user_id)
+            print(f"Ошибка выгрузки данных для {user_id}: {e}")
+            await message.answer(
+                "Не удалось подготовить выгрузку, попробуй еще раз позже."
+            )
@@ -12,9 +12,11 @@ from repositories import GoalRepository
 from services.goal_analysis_service import (
     generate_clarifying_question,
     brainstorm_goal_failure,
-    analyze_goals_list
+    analyze_goals_list,
+    strip_list_marker
 )
 from services.ai_response_service import save_and_get_rating_keyboard
+from services.streaming_reply import StreamingReply
 
 # Максимальная длина сообщения в Telegram (с запасом для безопасности)
 MAX_MESSAGE_LENGTH = 4000
@@ -115,8 +117,11 @@ async def register_goals_handlers(dp, session_maker, bot):
         await state.update_data(goal_text=goal_text)
         await state.set_state(GoalStates.setting_result)
 
-        await message.answer("Секунду...")
-        question = await generate_clarifying_question(goal_text)
+        reply = StreamingReply(await message.answer("Секунду..."))
+        question = await generate_clarifying_question(
+            goal_text,
+            on_text=reply.update
+        )
 
         # Сохраняем ответ AI и получаем клавиатуру оценки
         kb_rating = await save_and_get_rating_keyboard(
@@ -126,7 +131,7 @@ async def register_goals_handlers(dp, session_maker, bot):
             question
         )
 
-        await message.answer(
+        await reply.finish(
             question,
             parse_mode="HTML",
             reply_markup=kb_rating
@@ -146,12 +151,19 @@ async def register_goals_handlers(dp, session_maker, bot):
         target_date = datetime.now() + timedelta(days=1)
 
         goal_repo = GoalRepository(session_maker)
-        existing_goal = await goal_repo.get_user_goal_for_date(
+        entry = await goal_repo.add_goal(
             user_id,
+            goal_text,
+            result_text,
             target_date
         )
 
-        if existing_goal:
+        if entry is None:
+            # На этот день уже есть активная цель
+            existing_goal = await goal_repo.get_user_goal_for_date(
+                user_id,
+                target_date
+            )
             await state.update_data(
                 new_goal_text=goal_text,
                 new_result_text=result_text,
@@ -171,12 +183,6 @@ async def register_goals_handlers(dp, session_maker, bot):
                 parse_mode="HTML"
             )
         else:
-            await goal_repo.add_goal(
-                user_id,
-                goal_text,
-                result_text,
-                target_date
-            )
             await message.answer(
                 f"✅ <b>Топ-цель сохранена!</b>\n\n"
                 f"🎯 <b>Задача:</b> {goal_text}\n"
@@ -217,8 +223,7 @@ async def register_goals_handlers(dp, session_maker, bot):
                 return
 
             goal_repo = GoalRepository(session_maker)
-            await goal_repo.delete_goal(existing_goal_id)
-            await goal_repo.add_goal(
+            await goal_repo.replace_goal(
                 user_id,
                 new_goal_text,
                 new_result_text,
@@ -335,13 +340,16 @@ async def register_goals_handlers(dp, session_maker, bot):
         goal_text = data.get('fail_goal_text', 'Цель')
         result_text = data.get('fail_result_text', 'Результат')
 
-        await message.answer("🤔 Анализирую ситуацию, одну секунду...")
+        reply = StreamingReply(
+            await message.answer("🤔 Анализирую ситуацию, одну секунду...")
+        )
 
-        # Вызываем AI для совета
+        # Вызываем AI для совета, ответ показываем по мере генерации
         advice = await brainstorm_goal_failure(
             goal_text,
             result_text,
-            reason
+            reason,
+            on_text=reply.update
         )
 
         # Формируем текст пользователя для сохранения
@@ -359,8 +367,8 @@ async def register_goals_handlers(dp, session_maker, bot):
             advice
         )
 
-        # Отправляем ответ с кнопками оценки (если есть)
-        await message.answer(
+        # Показываем итоговый ответ с кнопками оценки (если есть)
+        await reply.finish(
             advice,
             parse_mode="markdown",
             reply_markup=kb_rating
@@ -422,10 +430,7 @@ async def register_goals_handlers(dp, session_maker, bot):
         # Убираем номера и маркеры в начале строк
         cleaned_goals = []
         for goal in goals_list:
-            # Убираем номера (1., 2., и т.д.)
-            goal = goal.lstrip('0123456789. ')
-            # Убираем маркеры (-, •, *, и т.д.)
-            goal = goal.lstrip('- •*→ ')
+            goal = strip_list_marker(goal)
             if goal:
                 cleaned_goals.append(goal)
 
@@ -8,10 +8,29 @@ from keyboards import (
     get_company_keyboard,
     get_start_keyboard
 )
-from repositories import JournalRepository
+from models import JournalEntry
+from repositories import (
+    JournalRepository,
+    UserRepository,
+    commit_unit_of_work
+)
+from services.timezone_service import get_user_local_time
+
+# Свой вариант ответа должен поместиться в колонку журнала
+MAX_ANSWER_LENGTH = JournalEntry.__table__.c.emotion.type.length
+
+
+async def check_custom_answer(message: types.Message) -> bool:
+    """Проверяет свой вариант ответа, иначе просит ввести его заново"""
+    if message.text and len(message.text) <= MAX_ANSWER_LENGTH:
+        return True
+    await message.answer(
+        f"Напиши ответ текстом, не длиннее {MAX_ANSWER_LENGTH} символов:"
+    )
+    return False
 
 
-async def register_journal_handlers(dp, session_maker):
+async def register_journal_handlers(dp, session_maker, analysis_queue):
     """Регистрация обработчиков для журнала триггеров"""
 
     @dp.message(F.text == "🔴 Записать срыв")
@@ -60,6 +79,8 @@ async def register_journal_handlers(dp, session_maker):
         message: types.Message,
         state: FSMContext
     ):
+        if not await check_custom_answer(message):
+            return
         await state.update_data(emotion=message.text)
         await ask_location(message, state)
 
@@ -98,6 +119,8 @@ async def register_journal_handlers(dp, session_maker):
         message: types.Message,
         state: FSMContext
     ):
+        if not await check_custom_answer(message):
+            return
         await state.update_data(location=message.text)
         await ask_company(message, state)
 
@@ -120,12 +143,17 @@ async def register_journal_handlers(dp, session_maker):
             user_id = callback_or_message.from_user.id
             message_obj = callback_or_message
 
+        # Время суток и день недели в статистике - по часам пользователя
+        user_settings = await UserRepository(
+            session_maker
+        ).get_user_settings(user_id)
         journal_repo = JournalRepository(session_maker)
         await journal_repo.add_entry(
             user_id,
             emotion,
             location,
-            company_text
+            company_text,
+            get_user_local_time(user_settings)
         )
 
         response_text = (
@@ -149,18 +177,14 @@ async def register_journal_handlers(dp, session_maker):
             )
         await state.clear()
 
-        from services.analysis_service import process_analysis_with_rating
-
         user_text = (
             f"Запись триггера: {emotion} + {location} + {company_text}"
         )
 
-        await process_analysis_with_rating(
-            session_maker,
-            user_id,
-            message_obj,
-            user_text
-        )
+        # Анализ идет в фоне, результат придет отдельным сообщением.
+        # Коммитим заранее, чтобы воркер увидел новую запись
+        await commit_unit_of_work()
+        analysis_queue.submit(user_id, message_obj.chat.id, user_text)
 
     @dp.callback_query(F.data.startswith("company:"), TriggerJournal.company)
     async def process_company(
@@ -181,4 +205,6 @@ async def register_journal_handlers(dp, session_maker):
         message: types.Message,
         state: FSMContext
     ):
+        if not await check_custom_answer(message):
+            return
         await finish_log(message, state, message.text)
@@ -1,31 +1,32 @@
 from aiogram import types, F
+from aiogram.exceptions import TelegramBadRequest
 
-from repositories import AIRepository
+from keyboards import get_rating_keyboard
 
 
-async def register_ratings_handlers(dp, session_maker):
+async def register_ratings_handlers(dp, session_maker, rating_coalescer):
     """Регистрация обработчиков для оценки ответов AI"""
 
-    @dp.callback_query(F.data.startswith("rate_up:"))
-    async def process_rate_up(callback: types.CallbackQuery):
-        nonlocal session_maker
+    async def rate(callback: types.CallbackQuery, rating: int, text: str):
         response_id = int(callback.data.split(":")[1])
 
-        ai_repo = AIRepository(session_maker)
-        await ai_repo.update_ai_rating(response_id, 1)
-        await callback.answer(
-            "Спасибо за оценку! 👍",
-            show_alert=False
-        )
+        # Запись в БД откладывается и объединяется с другими оценками
+        rating_coalescer.submit(response_id, rating)
+        await callback.answer(text, show_alert=False)
+
+        # Сразу отмечаем выбранную кнопку
+        try:
+            await callback.message.edit_reply_markup(
+                reply_markup=get_rating_keyboard(response_id, rating)
+            )
+        except TelegramBadRequest:
+            # Повторное нажатие той же кнопки: разметка не изменилась
+            pass
+
+    @dp.callback_query(F.data.startswith("rate_up:"))
+    async def process_rate_up(callback: types.CallbackQuery):
+        await rate(callback, 1, "Спасибо за оценку! 👍")
 
     @dp.callback_query(F.data.startswith("rate_down:"))
     async def process_rate_down(callback: types.CallbackQuery):
-        nonlocal session_maker
-        response_id = int(callback.data.split(":")[1])
-
-        ai_repo = AIRepository(session_maker)
-        await ai_repo.update_ai_rating(response_id, -1)
-        await callback.answer(
-            "Спасибо за оценку! 👎",
-            show_alert=False
-        )
+        await rate(callback, -1, "Спасибо за оценку! 👎")
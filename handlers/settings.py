@@ -1,11 +1,15 @@
 from aiogram import types, F
 from aiogram.fsm.context import FSMContext
-from datetime import datetime
 import pytz
 
 from states import SettingsStates
 from repositories import UserRepository
-from services.timezone_service import detect_timezone_from_time
+from services.scheduler import get_reminder_times
+from services.timezone_service import (
+    detect_timezone_from_time,
+    get_local_time,
+    parse_time_string
+)
 
 
 # Популярные часовые пояса
@@ -22,6 +26,20 @@ POPULAR_TIMEZONES = [
 ]
 
 
+REMINDER_LABELS = {
+    'morning': "☀️ Утреннее напоминание",
+    'evening': "🌙 Вечерний чек-ин",
+}
+
+
+def format_reminder_times(user_settings) -> str:
+    """Форматирует время напоминаний пользователя, например 9:00 и 21:00"""
+    reminder_times = get_reminder_times(user_settings)
+    return " и ".join(
+        f"{t.hour}:{t.minute:02d}" for t in reminder_times.values()
+    )
+
+
 async def register_settings_handlers(dp, session_maker):
     """Регистрация обработчиков для настроек"""
 
@@ -36,14 +54,16 @@ async def register_settings_handlers(dp, session_maker):
         tz_info = ""
         if current_tz:
             try:
-                tz = pytz.timezone(current_tz)
-                now = datetime.now(tz)
-                offset = now.strftime("%z")
+                offset = get_local_time(current_tz).strftime("%z")
                 tz_info = (
                     f"\n\nТекущий часовой пояс: {current_tz} ({offset})"
                 )
             except Exception:
                 tz_info = f"\n\nТекущий часовой пояс: {current_tz}"
+        tz_info += (
+            ("\n" if tz_info else "\n\n") +
+            f"Время напоминаний: {format_reminder_times(user_settings)}"
+        )
 
         from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
@@ -60,12 +80,19 @@ async def register_settings_handlers(dp, session_maker):
                     text="🕐 Определить по времени",
                     callback_data="tz_detect_by_time"
                 )
+            ],
+            [
+                InlineKeyboardButton(
+                    text="⏰ Время напоминаний",
+                    callback_data="reminder_times"
+                )
             ]
         ])
 
         await message.answer(
             f"⚙️ <b>Настройки</b>{tz_info}\n\n"
-            "Выбери способ установки часового пояса:",
+            "Выбери способ установки часового пояса "
+            "или измени время напоминаний:",
             parse_mode="HTML",
             reply_markup=settings_keyboard
         )
@@ -112,16 +139,18 @@ async def register_settings_handlers(dp, session_maker):
                 timezone
             )
 
-            tz = pytz.timezone(timezone)
-            tz_now = datetime.now(tz)
-            offset = tz_now.strftime("%z")
+            offset = get_local_time(timezone).strftime("%z")
             offset_formatted = f"{offset[:3]}:{offset[3:]}"
+            user_settings = await user_repo.get_user_settings(
+                message.from_user.id
+            )
 
             await message.answer(
                 f"✅ <b>Часовой пояс определен и установлен!</b>\n\n"
                 f"📍 Часовой пояс: <b>{timezone}</b>\n"
                 f"⏰ Смещение: <b>UTC{offset_formatted}</b>\n\n"
-                f"Напоминания будут приходить в 9:00 и 21:00 "
+                f"Напоминания будут приходить в "
+                f"{format_reminder_times(user_settings)} "
                 f"по твоему местному времени.",
                 parse_mode="HTML"
             )
@@ -153,6 +182,9 @@ async def register_settings_handlers(dp, session_maker):
             callback.from_user.id,
             timezone
         )
+        user_settings = await user_repo.get_user_settings(
+            callback.from_user.id
+        )
         tz_message = f"Часовой пояс установлен: {timezone}"
         await callback.answer(
             tz_message,
@@ -161,10 +193,93 @@ async def register_settings_handlers(dp, session_maker):
         await callback.message.edit_text(
             f"✅ <b>Часовой пояс установлен!</b>\n\n"
             f"Часовой пояс: {timezone}\n\n"
-            f"Напоминания будут приходить в 9:00 и 21:00 "
+            f"Напоминания будут приходить в "
+            f"{format_reminder_times(user_settings)} "
+            f"по твоему местному времени.",
+            parse_mode="HTML"
+        )
+
+    @dp.callback_query(F.data == "reminder_times")
+    async def show_reminder_times(callback: types.CallbackQuery):
+        nonlocal session_maker
+        user_repo = UserRepository(session_maker)
+        user_settings = await user_repo.get_user_settings(
+            callback.from_user.id
+        )
+        await callback.message.edit_text(
+            "⏰ <b>Время напоминаний</b>\n\n"
+            f"Сейчас: {format_reminder_times(user_settings)} "
+            "по твоему местному времени.\n\n"
+            "Какое напоминание изменить?",
+            parse_mode="HTML",
+            reply_markup=get_reminder_times_keyboard(user_settings)
+        )
+        await callback.answer()
+
+    @dp.callback_query(F.data.startswith("reminder_time:"))
+    async def start_reminder_time_setting(
+        callback: types.CallbackQuery,
+        state: FSMContext
+    ):
+        reminder_type = callback.data.split(":")[1]
+        if reminder_type == "morning":
+            await state.set_state(SettingsStates.setting_morning_time)
+        else:
+            await state.set_state(SettingsStates.setting_evening_time)
+
+        await callback.message.edit_text(
+            f"{REMINDER_LABELS[reminder_type]}\n\n"
+            "Отправь время в формате <b>HH:MM</b>\n"
+            "Например: <code>8:30</code> или <code>22:00</code>",
+            parse_mode="HTML"
+        )
+        await callback.answer()
+
+    async def process_reminder_time(
+        message: types.Message,
+        state: FSMContext,
+        reminder_type: str
+    ):
+        """Сохраняет время напоминания, присланное пользователем"""
+        nonlocal session_maker
+        reminder_time, error_msg = parse_time_string(message.text)
+        if reminder_time is None:
+            await message.answer(
+                f"❌ {error_msg}\n\nПопробуй еще раз.",
+                parse_mode="HTML"
+            )
+            return
+
+        user_repo = UserRepository(session_maker)
+        await user_repo.set_reminder_times(
+            message.from_user.id,
+            **{f"{reminder_type}_time": reminder_time}
+        )
+        user_settings = await user_repo.get_user_settings(
+            message.from_user.id
+        )
+        await message.answer(
+            f"✅ <b>Время сохранено!</b>\n\n"
+            f"Напоминания будут приходить в "
+            f"{format_reminder_times(user_settings)} "
             f"по твоему местному времени.",
             parse_mode="HTML"
         )
+        await state.clear()
+
+    @dp.message(SettingsStates.setting_morning_time)
+    async def process_morning_time(
+        message: types.Message,
+        state: FSMContext
+    ):
+        await process_reminder_time(message, state, "morning")
+
+    @dp.message(SettingsStates.setting_evening_time)
+    async def process_evening_time(
+        message: types.Message,
+        state: FSMContext
+    ):
+        await process_reminder_time(message, state, "evening")
 
 
 def get_timezone_keyboard():
@@ -181,3 +296,24 @@ def get_timezone_keyboard():
         ])
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_reminder_times_keyboard(user_settings):
+    """Создает клавиатуру для выбора изменяемого напоминания"""
+    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+    reminder_times = get_reminder_times(user_settings)
+    buttons = []
+    for reminder_type, label in REMINDER_LABELS.items():
+        reminder_time = reminder_times[reminder_type]
+        buttons.append([
+            InlineKeyboardButton(
+                text=(
+                    f"{label} ({reminder_time.hour}:"
+                    f"{reminder_time.minute:02d})"
+                ),
+                callback_data=f"reminder_time:{reminder_type}"
+            )
+        ])
+
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
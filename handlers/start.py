@@ -1,9 +1,75 @@
+import html
+from datetime import datetime
+
 from aiogram import types, F
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
-from keyboards import get_start_keyboard
-from repositories import JournalRepository
+from keyboards import (
+    get_start_keyboard,
+    get_history_keyboard,
+    HISTORY_CURSOR_FORMAT
+)
+from repositories import JournalRepository, GoalRepository
+
+HISTORY_PAGE_SIZE = 10
+# Длина одного поля записи на странице истории: страница из
+# HISTORY_PAGE_SIZE записей должна уложиться в 4096 символов Telegram
+JOURNAL_FIELD_LENGTH = 100
+GOAL_FIELD_LENGTH = 150
+
+
+def format_field(value, limit: int) -> str:
+    """Пользовательский текст для HTML-сообщения, обрезанный до limit"""
+    value = str(value)
+    if len(value) > limit:
+        value = value[:limit - 1] + "…"
+    return html.escape(value)
+
+
+def format_journal_page(entries) -> str:
+    """Текст страницы журнала триггеров"""
+    text_response = "<b>📋 Твои записи:</b>\n\n"
+    for entry in entries:
+        date_str = entry.created_at.strftime("%d.%m.%Y %H:%M")
+        text_response += f"🗓 <code>{date_str}</code>\n"
+        text_response += (
+            f"😰 {format_field(entry.emotion, JOURNAL_FIELD_LENGTH)} | "
+            f"📍 {format_field(entry.location, JOURNAL_FIELD_LENGTH)} | "
+            f"👥 {format_field(entry.company, JOURNAL_FIELD_LENGTH)}\n\n"
+        )
+    return text_response
+
+
+# is_completed -> значок в истории
+GOAL_STATUS_ICONS = {0: "⏳", 1: "✅", 2: "↪️"}
+
+
+def format_goals_page(goals) -> str:
+    """Текст страницы истории целей"""
+    text_response = "<b>🎯 Твои цели:</b>\n\n"
+    for goal in goals:
+        date_str = goal.target_date.strftime("%d.%m.%Y")
+        status = GOAL_STATUS_ICONS.get(goal.is_completed, "⏳")
+        text_response += f"{status} <code>{date_str}</code>\n"
+        text_response += (
+            f"🎯 {format_field(goal.goal_text, GOAL_FIELD_LENGTH)}\n"
+        )
+        if goal.result_text:
+            text_response += (
+                f"🏁 {format_field(goal.result_text, GOAL_FIELD_LENGTH)}\n"
+            )
+        text_response += "\n"
+    return text_response
+
+
+def parse_history_cursor(cursor: str) -> tuple[datetime, int]:
+    created_at, item_id = cursor.split(":")
+    return (
+        datetime.strptime(created_at, HISTORY_CURSOR_FORMAT),
+        int(item_id)
+    )
 
 
 async def register_start_handlers(dp, session_maker):
@@ -24,26 +90,91 @@ async def register_start_handlers(dp, session_maker):
             reply_markup=get_start_keyboard()
         )
 
+    async def get_history_page(
+        kind: str,
+        user_id: int,
+        before=None,
+        after=None
+    ):
+        """Страница истории: (текст, клавиатура) или None, если пусто"""
+        if kind == 'goals':
+            items, has_older, has_newer = await GoalRepository(
+                session_maker
+            ).get_goals_page(user_id, HISTORY_PAGE_SIZE, before, after)
+            if not items:
+                return None
+            text_response = format_goals_page(items)
+        else:
+            items, has_older, has_newer = await JournalRepository(
+                session_maker
+            ).get_entries_page(user_id, HISTORY_PAGE_SIZE, before, after)
+            if not items:
+                return None
+            text_response = format_journal_page(items)
+
+        return text_response, get_history_keyboard(
+            kind, items, has_older, has_newer
+        )
+
     @dp.message(F.text == "📜 История")
     async def show_history(message: types.Message, state: FSMContext):
         await state.clear()
-        nonlocal session_maker
-
-        journal_repo = JournalRepository(session_maker)
-        entries = await journal_repo.get_entries(message.from_user.id)
 
-        if not entries:
+        page = await get_history_page('journal', message.from_user.id)
+        if page is None:
+            page = await get_history_page('goals', message.from_user.id)
+        if page is None:
             await message.answer("У тебя пока нет записей.")
             return
 
-        text_response = "<b>📋 Твои последние записи:</b>\n\n"
-        for entry in entries:
-            date_str = entry.created_at.strftime("%d.%m %H:%M")
-            text_response += f"🗓 <code>{date_str}</code>\n"
-            text_response += (
-                f"😰 {entry.emotion} | "
-                f"📍 {entry.location} | "
-                f"👥 {entry.company}\n\n"
+        text_response, keyboard = page
+        try:
+            await message.answer(
+                text_response,
+                parse_mode="HTML",
+                reply_markup=keyboard
             )
+        except TelegramBadRequest as e:
+            print(f"Ошибка отправки истории: {e}")
+            await message.answer("Не удалось показать историю.")
 
-        await message.answer(text_response, parse_mode="HTML")
+    @dp.callback_query(F.data.startswith("history:"))
+    async def process_history_page(callback: types.CallbackQuery):
+        # history:<kind>[:before|after:<created_at>:<id>]
+        parts = callback.data.split(":", 3)
+        kind = parts[1]
+        before = after = None
+        if len(parts) == 4:
+            cursor = parse_history_cursor(parts[3])
+            if parts[2] == 'before':
+                before = cursor
+            else:
+                after = cursor
+
+        page = await get_history_page(
+            kind,
+            callback.from_user.id,
+            before,
+            after
+        )
+        if page is None:
+            await callback.answer(
+                "Здесь пока нет записей.",
+                show_alert=False
+            )
+            return
+
+        text_response, keyboard = page
+        try:
+            await callback.message.edit_text(
+                text_response,
+                parse_mode="HTML",
+                reply_markup=keyboard
+            )
+        except TelegramBadRequest as e:
+            # Страница не изменилась - не ошибка
+            if "message is not modified" not in str(e):
+                print(f"Ошибка отправки страницы истории: {e}")
+                await callback.answer("Не удалось показать страницу.")
+                return
+        await callback.answer()
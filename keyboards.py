@@ -132,17 +132,20 @@ def get_company_keyboard() -> InlineKeyboardMarkup:
     )
 
 
-def get_rating_keyboard(response_id: int) -> InlineKeyboardMarkup:
-    """Клавиатура оценки ответа AI"""
+def get_rating_keyboard(
+    response_id: int,
+    rating: int | None = None
+) -> InlineKeyboardMarkup:
+    """Клавиатура оценки ответа AI (выбранная оценка отмечена)"""
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
                 InlineKeyboardButton(
-                    text="👍",
+                    text="👍 ✓" if rating == 1 else "👍",
                     callback_data=f"rate_up:{response_id}"
                 ),
                 InlineKeyboardButton(
-                    text="👎",
+                    text="👎 ✓" if rating == -1 else "👎",
                     callback_data=f"rate_down:{response_id}"
                 )
             ]
@@ -199,4 +202,52 @@ def get_new_goal_keyboard() -> InlineKeyboardMarkup:
                 )
             ]
         ]
-    )
\ No newline at end of file
+    )
+
+
+HISTORY_CURSOR_FORMAT = "%Y%m%d%H%M%S%f"
+
+
+def encode_history_cursor(item) -> str:
+    """Курсор страницы истории: created_at и id записи"""
+    return f"{item.created_at.strftime(HISTORY_CURSOR_FORMAT)}:{item.id}"
+
+
+def get_history_keyboard(
+    kind: str,
+    items: list,
+    has_older: bool,
+    has_newer: bool
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура листания истории (kind: 'journal' или 'goals').
+    Курсоры первой и последней записи страницы передаются в callback_data.
+    """
+    nav_row = []
+    if has_newer:
+        nav_row.append(InlineKeyboardButton(
+            text="⬅️ Новее",
+            callback_data=f"history:{kind}:after:"
+                          f"{encode_history_cursor(items[0])}"
+        ))
+    if has_older:
+        nav_row.append(InlineKeyboardButton(
+            text="Старше ➡️",
+            callback_data=f"history:{kind}:before:"
+                          f"{encode_history_cursor(items[-1])}"
+        ))
+
+    if kind == 'journal':
+        switch_button = InlineKeyboardButton(
+            text="🎯 История целей",
+            callback_data="history:goals"
+        )
+    else:
+        switch_button = InlineKeyboardButton(
+            text="📋 Журнал триггеров",
+            callback_data="history:journal"
+        )
+
+    return InlineKeyboardMarkup(
+        inline_keyboard=[row for row in (nav_row, [switch_button]) if row]
+    )
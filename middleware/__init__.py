@@ -1,5 +1,10 @@
 from middleware.db_check import DatabaseCheckMiddleware
 from middleware.error_handler import ErrorHandlerMiddleware
+from middleware.db_session import DatabaseSessionMiddleware
 
-__all__ = ['DatabaseCheckMiddleware', 'ErrorHandlerMiddleware']
+__all__ = [
+    'DatabaseCheckMiddleware',
+    'ErrorHandlerMiddleware',
+    'DatabaseSessionMiddleware',
+]
 
@@ -0,0 +1,28 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from repositories import unit_of_work
+
+
+class DatabaseSessionMiddleware(BaseMiddleware):
+    """
+    Middleware, открывающий одну сессию и транзакцию БД на апдейт.
+    Все репозитории внутри обработчика работают в ней, коммит
+    выполняется после успешной обработки, при ошибке - откат.
+    """
+
+    def __init__(self, session_maker):
+        self.session_maker = session_maker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if not self.session_maker:
+            return await handler(event, data)
+
+        async with unit_of_work(self.session_maker) as uow:
+            data['uow'] = uow
+            return await handler(event, data)
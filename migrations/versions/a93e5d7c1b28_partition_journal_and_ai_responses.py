@@ -0,0 +1,127 @@
+"""partition_journal_and_ai_responses
+
+Revision ID: a93e5d7c1b28
+Revises: f41b8c2d9e06
+Create Date: 2026-10-17 15:48:36.250914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93e5d7c1b28'
+down_revision: Union[str, None] = 'f41b8c2d9e06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created ahead of the current one; later months are created
+# by the partition maintenance job
+MONTHS_AHEAD = 2
+
+# Table-specific columns between user_id and created_at
+COLUMNS = {
+    'journal_entries': [
+        ('emotion', 'VARCHAR(255)'),
+        ('location', 'VARCHAR(255)'),
+        ('company', 'VARCHAR(255)'),
+    ],
+    'ai_responses': [
+        ('user_text', 'VARCHAR NOT NULL'),
+        ('ai_response', 'VARCHAR NOT NULL'),
+        ('rating', 'INTEGER'),
+    ],
+}
+INDEXES = {
+    'journal_entries': ['ix_journal_entries_user_id_created_at'],
+    'ai_responses': [],
+}
+
+
+def _create_monthly_partitions(table: str, since: str) -> None:
+    # One partition per month from `since` up to MONTHS_AHEAD months ahead
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month_start DATE := date_trunc('month', {since})::date;
+        BEGIN
+            WHILE month_start <= date_trunc('month', now())::date
+                    + interval '{MONTHS_AHEAD} months' LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF {table} '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_p' || to_char(month_start, 'YYYY_MM'),
+                    month_start,
+                    month_start + interval '1 month'
+                );
+                month_start := month_start + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+
+
+def _column_ddl(table: str) -> str:
+    return ''.join(f"{name} {ddl}, " for name, ddl in COLUMNS[table])
+
+
+def upgrade() -> None:
+    for table in COLUMNS:
+        columns = _column_ddl(table)
+        old = f'{table}_old'
+        op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+        for index in INDEXES[table]:
+            op.drop_index(index, table_name=old)
+
+        # The primary key of a partitioned table must include created_at
+        op.execute(
+            f"CREATE TABLE {table} ("
+            f"id INTEGER NOT NULL DEFAULT nextval('{table}_id_seq'), "
+            f"user_id BIGINT NOT NULL, "
+            f"{columns}"
+            f"created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            f"CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)"
+            f") PARTITION BY RANGE (created_at)"
+        )
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        _create_monthly_partitions(
+            table,
+            f"COALESCE((SELECT MIN(created_at) FROM {old}), now())"
+        )
+        # Rows outside of the created months never get lost
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        op.execute(
+            f"INSERT INTO {table} "
+            f"SELECT id, user_id, "
+            f"{''.join(f'{name}, ' for name, _ in COLUMNS[table])}"
+            f"COALESCE(created_at, CURRENT_TIMESTAMP) FROM {old}"
+        )
+        op.drop_table(old)
+
+    op.create_index('ix_journal_entries_user_id_created_at', 'journal_entries', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_ai_responses_user_id_created_at', 'ai_responses', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    for table in COLUMNS:
+        columns = _column_ddl(table)
+        old = f'{table}_partitioned'
+        op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+        op.execute(
+            f"CREATE TABLE {table} ("
+            f"id INTEGER NOT NULL DEFAULT nextval('{table}_id_seq'), "
+            f"user_id BIGINT NOT NULL, "
+            f"{columns}"
+            f"created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+            f"CONSTRAINT {table}_pkey PRIMARY KEY (id)"
+            f")"
+        )
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        op.drop_table(old)
+
+    op.create_index('ix_journal_entries_user_id_created_at', 'journal_entries', ['user_id', 'created_at'], unique=False)
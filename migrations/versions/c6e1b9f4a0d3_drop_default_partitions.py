@@ -0,0 +1,64 @@
+"""drop_default_partitions
+
+Revision ID: c6e1b9f4a0d3
+Revises: a4d9e7c2b638
+Create Date: 2026-10-17 23:12:47.530218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from config import PARTITION_MONTHS_AHEAD
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e1b9f4a0d3'
+down_revision: Union[str, None] = 'a4d9e7c2b638'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('journal_entries', 'ai_responses')
+
+
+def _create_monthly_partitions(table: str, since: str, until: str) -> None:
+    # One partition per month from `since` up to `until`
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month_start DATE := date_trunc('month', {since})::date;
+        BEGIN
+            WHILE month_start <= date_trunc('month', {until})::date LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF {table} '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_p' || to_char(month_start, 'YYYY_MM'),
+                    month_start,
+                    month_start + interval '1 month'
+                );
+                month_start := month_start + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+
+
+def upgrade() -> None:
+    # A DEFAULT partition holding rows of a month blocks creating that
+    # month's partition, so its rows are moved to monthly partitions
+    for table in TABLES:
+        default = f'{table}_default'
+        op.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+        _create_monthly_partitions(
+            table,
+            f"COALESCE((SELECT MIN(created_at) FROM {default}), now())",
+            f"GREATEST((SELECT MAX(created_at) FROM {default}), "
+            f"now() + interval '{PARTITION_MONTHS_AHEAD} months')"
+        )
+        op.execute(f"INSERT INTO {table} SELECT * FROM {default}")
+        op.drop_table(default)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
@@ -0,0 +1,37 @@
+"""add_user_indexes
+
+Revision ID: c7d4e9a1f352
+Revises: 8b3f1d6e2a47
+Create Date: 2026-10-17 13:05:27.904410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d4e9a1f352'
+down_revision: Union[str, None] = '8b3f1d6e2a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_journal_entries_user_id_created_at', 'journal_entries', ['user_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_analysis_entries_user_id_created_at', 'analysis_entries', ['user_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_goal_entries_user_id_created_at', 'goal_entries', ['user_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_goal_entries_user_id_target_date', 'goal_entries', ['user_id', 'target_date'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_goal_entries_active_target_date', 'goal_entries', ['target_date'], unique=False, postgresql_where=sa.text('is_completed = 0'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_goal_entries_active_target_date', table_name='goal_entries', postgresql_concurrently=True)
+        op.drop_index('ix_goal_entries_user_id_target_date', table_name='goal_entries', postgresql_concurrently=True)
+        op.drop_index('ix_goal_entries_user_id_created_at', table_name='goal_entries', postgresql_concurrently=True)
+        op.drop_index('ix_analysis_entries_user_id_created_at', table_name='analysis_entries', postgresql_concurrently=True)
+        op.drop_index('ix_journal_entries_user_id_created_at', table_name='journal_entries', postgresql_concurrently=True)
@@ -0,0 +1,47 @@
+"""add_active_goal_unique_index
+
+Revision ID: e2a6f0b83c19
+Revises: c7d4e9a1f352
+Create Date: 2026-10-17 14:21:43.118205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a6f0b83c19'
+down_revision: Union[str, None] = 'c7d4e9a1f352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Older duplicate active goals are marked superseded instead of being
+# deleted: they leave the partial index and stay in the history
+SUPERSEDED = 2
+
+
+def upgrade() -> None:
+    # Only the latest goal per user and day stays active
+    op.execute(
+        f"UPDATE goal_entries g SET is_completed = {SUPERSEDED} "
+        "FROM goal_entries newer "
+        "WHERE g.is_completed = 0 AND newer.is_completed = 0 "
+        "AND g.user_id = newer.user_id "
+        "AND CAST(g.target_date AS DATE) = CAST(newer.target_date AS DATE) "
+        "AND newer.id > g.id"
+    )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('uq_goal_entries_user_id_active_day', 'goal_entries', ['user_id', sa.text('CAST(target_date AS DATE)')], unique=True, postgresql_where=sa.text('is_completed = 0'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_goal_entries_user_id_active_day', table_name='goal_entries', postgresql_concurrently=True)
+    op.execute(
+        f"UPDATE goal_entries SET is_completed = 0 "
+        f"WHERE is_completed = {SUPERSEDED}"
+    )
@@ -1,18 +1,29 @@
 from models.base import Base
 
+from models.text_blob import AITextBlob
 from models.journal import JournalEntry
-from models.analysis import AnalysisEntry
+from models.analysis import AnalysisEntry, AnalysisState
 from models.goals import GoalEntry
 from models.ai import AIResponse
 from models.user import UserSettings
+from models.reminder import SentReminder
+from models.active_user import ActiveGoalUser
+from models.rollup import TriggerRollup
+from models.llm_cache import LLMCacheEntry
 
 __all__ = [
     'Base',
+    'AITextBlob',
     'JournalEntry',
     'AnalysisEntry',
+    'AnalysisState',
     'GoalEntry',
     'AIResponse',
     'UserSettings',
+    'SentReminder',
+    'ActiveGoalUser',
+    'TriggerRollup',
+    'LLMCacheEntry',
 ]
 
 
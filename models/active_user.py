@@ -0,0 +1,10 @@
+from sqlalchemy import Column, BigInteger, TIMESTAMP, text
+from models.base import Base
+
+class ActiveGoalUser(Base):
+    """Пользователи с невыполненными целями (поддерживается при записи целей)"""
+    __tablename__ = 'active_goal_users'
+
+    user_id = Column(BigInteger, primary_key=True)
+    last_target_date = Column(TIMESTAMP, nullable=False, index=True)  # Самая поздняя дата активной цели
+    updated_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
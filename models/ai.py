@@ -1,14 +1,19 @@
-from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, text
+from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, ForeignKey, Index, text
 from models.base import Base
 
 class AIResponse(Base):
     __tablename__ = 'ai_responses'
+    __table_args__ = (
+        Index('ix_ai_responses_user_id_created_at', 'user_id', 'created_at'),
+        # Monthly partitions are managed by services/partition_service.py
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, nullable=False)
     user_text = Column(String, nullable=False)
-    ai_response = Column(String, nullable=False)
+    ai_response_hash = Column(String(64), ForeignKey('ai_text_blobs.hash'), nullable=False, index=True)  # Текст в ai_text_blobs
     rating = Column(Integer, nullable=True)  # 1 для палец вверх, -1 для палец вниз, NULL если не оценено
-    created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
+    created_at = Column(TIMESTAMP, primary_key=True, server_default=text('CURRENT_TIMESTAMP'))  # Ключ партиционирования, входит в PK
 
 
@@ -1,12 +1,24 @@
-from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, text
+from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, ForeignKey, Index, text
 from models.base import Base
 
 class AnalysisEntry(Base):
     __tablename__ = 'analysis_entries'
+    __table_args__ = (
+        Index('ix_analysis_entries_user_id_created_at', 'user_id', 'created_at'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, nullable=False)
-    analysis = Column(String, nullable=False)
+    analysis_hash = Column(String(64), ForeignKey('ai_text_blobs.hash'), nullable=False, index=True)  # Текст в ai_text_blobs
     created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
 
 
+class AnalysisState(Base):
+    """Состояние триггера анализа пользователя"""
+    __tablename__ = 'analysis_states'
+
+    user_id = Column(BigInteger, primary_key=True)
+    last_entry_id = Column(Integer, nullable=True)  # Последняя запись журнала, учтенная в анализе
+    fingerprint = Column(String(64), nullable=True)  # Отпечаток набора триггеров на момент анализа
+    analyzed_at = Column(TIMESTAMP, nullable=True)
+    updated_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'), onupdate=text('CURRENT_TIMESTAMP'))
@@ -1,15 +1,32 @@
-from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, text
+from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, Date, Index, cast, text
 from models.base import Base
 
 class GoalEntry(Base):
     __tablename__ = 'goal_entries'
+    __table_args__ = (
+        Index('ix_goal_entries_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_goal_entries_user_id_target_date', 'user_id', 'target_date'),
+        Index(
+            'ix_goal_entries_active_target_date',
+            'target_date',
+            postgresql_where=text('is_completed = 0')
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, nullable=False)
     goal_text = Column(String, nullable=False)
     result_text = Column(String)
     target_date = Column(TIMESTAMP, nullable=False)
-    is_completed = Column(Integer, server_default=text('0'))
+    is_completed = Column(Integer, server_default=text('0'))  # 0 - активна, 1 - выполнена, 2 - заменена более новой целью того же дня
     created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
 
 
+# Не больше одной активной цели на пользователя и день
+Index(
+    'uq_goal_entries_user_id_active_day',
+    GoalEntry.user_id,
+    cast(GoalEntry.target_date, Date),
+    unique=True,
+    postgresql_where=text('is_completed = 0')
+)
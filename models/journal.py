@@ -1,14 +1,19 @@
-from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, text
+from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, Index, text
 from models.base import Base
 
 class JournalEntry(Base):
     __tablename__ = 'journal_entries'
+    __table_args__ = (
+        Index('ix_journal_entries_user_id_created_at', 'user_id', 'created_at'),
+        # Monthly partitions are managed by services/partition_service.py
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, nullable=False)
     emotion = Column(String(255))
     location = Column(String(255))
     company = Column(String(255))
-    created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
+    created_at = Column(TIMESTAMP, primary_key=True, server_default=text('CURRENT_TIMESTAMP'))  # Ключ партиционирования, входит в PK
 
 
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, TIMESTAMP, text
+from models.base import Base
+
+class LLMCacheEntry(Base):
+    """Кэш ответов LLM по нормализованному входу"""
+    __tablename__ = 'llm_cache'
+
+    key = Column(String(64), primary_key=True)  # sha256 функции, модели, версии промпта и входа
+    feature = Column(String(32), nullable=False)
+    response = Column(String, nullable=False)  # Ответ (JSON для структурированных ответов)
+    expires_at = Column(TIMESTAMP, nullable=False, index=True)
+    created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
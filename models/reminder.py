@@ -0,0 +1,21 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Date, TIMESTAMP, Index, text
+from models.base import Base
+
+class SentReminder(Base):
+    __tablename__ = 'sent_reminders'
+    __table_args__ = (
+        # Напоминания, отправка которых еще не подтверждена
+        Index(
+            'ix_sent_reminders_pending_lease',
+            'lease_until',
+            postgresql_where=text('sent_at IS NULL')
+        ),
+    )
+
+    user_id = Column(BigInteger, primary_key=True)
+    reminder_type = Column(String(16), primary_key=True)  # 'morning' / 'evening'
+    local_date = Column(Date, primary_key=True, index=True)  # Дата по местному времени пользователя
+    lease_until = Column(TIMESTAMP, nullable=True)  # UTC; до этого времени отправку держит один экземпляр бота
+    attempts = Column(Integer, nullable=False, server_default=text('1'))  # Сколько раз отправка бралась в работу
+    sent_at = Column(TIMESTAMP, nullable=True)  # UTC; NULL - отправка не подтверждена
+    created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
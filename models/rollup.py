@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Date, text
+from models.base import Base
+
+class TriggerRollup(Base):
+    """
+    Счетчики записей журнала по пользователю, дню и измерению.
+    День и час - по местному времени пользователя.
+    """
+    __tablename__ = 'trigger_rollups'
+
+    user_id = Column(BigInteger, primary_key=True)
+    day = Column(Date, primary_key=True)
+    dimension = Column(String(32), primary_key=True)  # 'emotion', 'emotion+location', 'hour', ...
+    key = Column(String(1600), primary_key=True)  # Значение измерения или JSON-массив значений сочетания
+    count = Column(Integer, nullable=False, server_default=text('0'))
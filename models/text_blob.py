@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, TIMESTAMP, text
+from models.base import Base
+
+class AITextBlob(Base):
+    """Тексты ответов AI, адресуемые по sha256 (хранятся один раз)"""
+    __tablename__ = 'ai_text_blobs'
+
+    hash = Column(String(64), primary_key=True)  # sha256 текста в hex
+    content = Column(String, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, text
+from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, Time, text
 from models.base import Base
 
 class UserSettings(Base):
@@ -7,7 +7,9 @@ class UserSettings(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, nullable=False, unique=True)
     timezone = Column(String(50), nullable=True)  # Например: 'Europe/Moscow', 'America/New_York'
+    morning_time = Column(Time, nullable=True)  # NULL - дефолтное 09:00
+    evening_time = Column(Time, nullable=True)  # NULL - дефолтное 21:00
+    next_fire_at = Column(TIMESTAMP, nullable=True, index=True)  # UTC, NULL - нет активных целей
+    next_reminder_type = Column(String(16), nullable=True)
     created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
     updated_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'), onupdate=text('CURRENT_TIMESTAMP'))
-
-
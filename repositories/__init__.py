@@ -1,15 +1,45 @@
 # Repository layer for database operations
-from .journal_repository import JournalRepository
+from .base import (
+    BaseRepository,
+    UnitOfWork,
+    unit_of_work,
+    commit_unit_of_work
+)
+from .write_behind import WriteBehindBuffer
+from .journal_repository import (
+    JournalRepository,
+    format_rollup_key,
+    split_rollup_key
+)
 from .analysis_repository import AnalysisRepository
 from .goal_repository import GoalRepository
 from .ai_repository import AIRepository
 from .user_repository import UserRepository
+from .reminder_repository import ReminderRepository
+from .partition_repository import PartitionRepository, PARTITIONED_TABLES
+from .export_repository import ExportRepository, EXPORT_MODELS
+from .text_blob_repository import TextBlobRepository
+from .llm_cache_repository import LLMCacheRepository
 
 __all__ = [
+    'BaseRepository',
     'JournalRepository',
+    'format_rollup_key',
+    'split_rollup_key',
     'AnalysisRepository',
     'GoalRepository',
     'AIRepository',
     'UserRepository',
+    'ReminderRepository',
+    'PartitionRepository',
+    'PARTITIONED_TABLES',
+    'ExportRepository',
+    'EXPORT_MODELS',
+    'TextBlobRepository',
+    'LLMCacheRepository',
+    'UnitOfWork',
+    'unit_of_work',
+    'commit_unit_of_work',
+    'WriteBehindBuffer',
 ]
 
@@ -1,31 +1,93 @@
 """Repository for AIResponse operations"""
-from sqlalchemy import update
-from models import AIResponse
+from datetime import datetime
+from sqlalchemy import update, values, column, Integer
+from models import AIResponse, AITextBlob
 from .base import BaseRepository
+from .text_blob_repository import text_hash, insert_text
 
 
 class AIRepository(BaseRepository):
     """Repository for managing AI responses"""
     
     async def add_ai_response(self, user_id, user_text, ai_response):
-        """Add a new AI response and return its ID"""
-        async with self.session_maker() as session:
-            async with session.begin():
-                entry = AIResponse(
-                    user_id=user_id,
-                    user_text=user_text,
-                    ai_response=ai_response
-                )
-                session.add(entry)
-                await session.flush()  # Get entry ID
-                return entry.id
+        """
+        Add a new AI response and return its ID.
+        The response text is stored in ai_text_blobs.
+        """
+        if self.write_buffer is not None:
+            # The ID comes from the sequence, the row is written later
+            response_id = await self.write_buffer.next_id(AIResponse)
+            response_hash = text_hash(ai_response)
+            await self._buffer_writes([
+                (AITextBlob, {
+                    'hash': response_hash,
+                    'content': ai_response,
+                }),
+                (AIResponse, {
+                    'id': response_id,
+                    'user_id': user_id,
+                    'user_text': user_text,
+                    'ai_response_hash': response_hash,
+                    'rating': None,
+                    'created_at': datetime.now(),
+                }),
+            ])
+            return response_id
+        response_hash, stmt = insert_text(ai_response)
+        async with self._transaction() as session:
+            await session.execute(stmt)
+            entry = AIResponse(
+                user_id=user_id,
+                user_text=user_text,
+                ai_response_hash=response_hash
+            )
+            session.add(entry)
+            await session.flush()  # Get entry ID
+            return entry.id
     
     async def update_ai_rating(self, response_id, rating: int):
         """Update AI response rating"""
-        async with self.session_maker() as session:
-            async with session.begin():
-                stmt = update(AIResponse).where(
-                    AIResponse.id == response_id
-                ).values(rating=rating)
-                await session.execute(stmt)
+        buffer = self.write_buffer
+        if buffer is not None:
+            if buffer.update_pending(
+                AIResponse, response_id, {'rating': rating}
+            ):
+                return
+            # The row may be in a batch that is being written right now
+            await buffer.wait_flushed()
+        async with self._transaction() as session:
+            stmt = update(AIResponse).where(
+                AIResponse.id == response_id
+            ).values(rating=rating)
+            await session.execute(stmt)
+
+    async def update_ai_ratings(self, ratings: dict[int, int]) -> None:
+        """
+        Set ratings of many AI responses ({response_id: rating})
+        with one UPDATE ... FROM (VALUES ...) statement.
+        """
+        buffer = self.write_buffer
+        if buffer is not None:
+            ratings = {
+                response_id: rating
+                for response_id, rating in ratings.items()
+                if not buffer.update_pending(
+                    AIResponse, response_id, {'rating': rating}
+                )
+            }
+            await buffer.wait_flushed()
+        if not ratings:
+            return
 
+        new_ratings = values(
+            column('id', Integer),
+            column('rating', Integer),
+            name='new_ratings'
+        ).data(list(ratings.items()))
+        async with self._transaction() as session:
+            stmt = update(AIResponse).where(
+                AIResponse.id == new_ratings.c.id
+            ).values(
+                rating=new_ratings.c.rating
+            ).execution_options(synchronize_session=False)
+            await session.execute(stmt)
@@ -1,28 +1,93 @@
 """Repository for AnalysisEntry operations"""
-from sqlalchemy import select
-from models import AnalysisEntry
+from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from models import AnalysisEntry, AnalysisState, AITextBlob
 from .base import BaseRepository
+from .text_blob_repository import text_hash, insert_text
 
 
 class AnalysisRepository(BaseRepository):
     """Repository for managing analysis entries"""
     
     async def add_analysis(self, user_id, analysis_text):
-        """Add a new analysis entry"""
-        async with self.session_maker() as session:
-            async with session.begin():
-                entry = AnalysisEntry(
-                    user_id=user_id,
-                    analysis=analysis_text
-                )
-                session.add(entry)
+        """Add a new analysis entry, its text is stored in ai_text_blobs"""
+        if self.write_buffer is not None:
+            analysis_hash = text_hash(analysis_text)
+            await self._buffer_writes([
+                (AITextBlob, {
+                    'hash': analysis_hash,
+                    'content': analysis_text,
+                }),
+                (AnalysisEntry, {
+                    'user_id': user_id,
+                    'analysis_hash': analysis_hash,
+                    'created_at': datetime.now(),
+                }),
+            ])
+            return
+        analysis_hash, stmt = insert_text(analysis_text)
+        async with self._transaction() as session:
+            await session.execute(stmt)
+            entry = AnalysisEntry(
+                user_id=user_id,
+                analysis_hash=analysis_hash
+            )
+            session.add(entry)
     
     async def get_latest_analysis(self, user_id: int):
         """Get the latest analysis entry for a user"""
-        async with self.session_maker() as session:
+        await self._sync_buffer(AnalysisEntry, user_id)
+        async with self._session() as session:
             stmt = select(AnalysisEntry).where(
                 AnalysisEntry.user_id == user_id
             ).order_by(AnalysisEntry.created_at.desc()).limit(1)
             result = await session.execute(stmt)
             return result.scalars().first()
 
+    async def get_latest_analysis_text(self, user_id: int):
+        """Get the text of the latest analysis for a user"""
+        await self._sync_buffer(AnalysisEntry, user_id)
+        async with self._session() as session:
+            return await session.scalar(
+                self._latest_analysis_text_stmt(user_id)
+            )
+
+    @staticmethod
+    def _latest_analysis_text_stmt(user_id):
+        return select(AITextBlob.content).join(
+            AnalysisEntry,
+            AnalysisEntry.analysis_hash == AITextBlob.hash
+        ).where(
+            AnalysisEntry.user_id == user_id
+        ).order_by(AnalysisEntry.created_at.desc()).limit(1)
+
+    async def get_state(self, user_id: int):
+        """Get analysis trigger state of a user"""
+        async with self._session() as session:
+            stmt = select(AnalysisState).where(
+                AnalysisState.user_id == user_id
+            ).execution_options(populate_existing=True)
+            result = await session.execute(stmt)
+            return result.scalars().first()
+
+    async def save_state(
+        self,
+        user_id: int,
+        last_entry_id,
+        fingerprint: str,
+        analyzed_at
+    ) -> None:
+        """Set analysis trigger state of a user (upsert operation)"""
+        values = {
+            'last_entry_id': last_entry_id,
+            'fingerprint': fingerprint,
+            'analyzed_at': analyzed_at,
+        }
+        stmt = insert(AnalysisState).values(user_id=user_id, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AnalysisState.user_id],
+            set_={**values, 'updated_at': func.now()}
+        )
+        async with self._transaction() as session:
+            await session.execute(stmt)
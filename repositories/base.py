@@ -1,11 +1,220 @@
 """Base repository class"""
 from abc import ABC
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import tuple_
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
 
+def day_bounds(day: date | datetime) -> tuple[datetime, datetime]:
+    """
+    Half-open [start, end) range of a calendar day.
+    Comparing a timestamp column with it keeps the predicate sargable,
+    unlike cast(column, Date) == day.
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+class UnitOfWork:
+    """
+    One session and transaction shared by all repositories
+    within a unit of work (e.g. one Telegram update).
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._after_commit = []
+
+    def after_commit(self, callback) -> None:
+        """Run `callback()` coroutine function after the next commit"""
+        self._after_commit.append(callback)
+
+    async def commit(self) -> None:
+        """
+        Commit the transaction and run after-commit callbacks.
+        Callbacks may write through repositories again, so commit
+        repeats until no callbacks are left.
+        """
+        while True:
+            await self.session.commit()
+            if not self._after_commit:
+                return
+            callbacks, self._after_commit = self._after_commit, []
+            for callback in callbacks:
+                await callback()
+
+
+_current_uow: ContextVar[UnitOfWork | None] = ContextVar(
+    'current_uow', default=None
+)
+
+
+@asynccontextmanager
+async def unit_of_work(session_maker: async_sessionmaker[AsyncSession]):
+    """
+    Open a unit of work bound to the current context.
+    Commits on success, rolls back on error.
+    A nested call reuses the outer unit of work.
+    """
+    uow = _current_uow.get()
+    if uow is not None:
+        yield uow
+        return
+
+    async with session_maker() as session:
+        uow = UnitOfWork(session)
+        token = _current_uow.set(uow)
+        try:
+            yield uow
+            await uow.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+        finally:
+            _current_uow.reset(token)
+
+
+async def commit_unit_of_work() -> None:
+    """
+    Commit the current unit of work early, e.g. before a slow
+    external call, so the connection is not held meanwhile.
+    """
+    uow = _current_uow.get()
+    if uow is not None:
+        await uow.commit()
+
+
 class BaseRepository(ABC):
     """Base class for all repositories"""
-    
+
+    listeners: list = []
+    # Optional WriteBehindBuffer for append-only inserts
+    write_buffer = None
+
     def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
         self.session_maker = session_maker
 
+    @classmethod
+    def set_write_buffer(cls, write_buffer) -> None:
+        """Route append-only inserts through a write-behind buffer"""
+        cls.write_buffer = write_buffer
+
+    async def _sync_buffer(self, model, user_id: int) -> None:
+        """Flush the user's buffered rows of `model` so reads see them"""
+        buffer = self.write_buffer
+        if buffer is not None and buffer.has_pending(model, user_id):
+            await buffer.flush(user_id)
+
+    async def _buffer_writes(self, rows=(), increments=()) -> None:
+        """
+        Queue rows [(model, values)] and counter increments
+        [(model, key, column)] in the write buffer. Inside a unit of
+        work they are queued after its commit, so a rolled back update
+        leaves nothing in the buffer.
+        """
+        buffer = self.write_buffer
+
+        async def enqueue():
+            for model, values in rows:
+                buffer.add(model, values)
+            for model, key, column in increments:
+                buffer.increment(model, key, column)
+
+        uow = _current_uow.get()
+        if uow is not None:
+            uow.after_commit(enqueue)
+            return
+        await enqueue()
+
+    @classmethod
+    def add_listener(cls, listener) -> None:
+        """Subscribe listener to write events of this repository"""
+        cls.listeners = [*cls.listeners, listener]
+
+    @asynccontextmanager
+    async def _session(self):
+        """Session of the current unit of work or a new one"""
+        uow = _current_uow.get()
+        if uow is not None:
+            yield uow.session
+            return
+        async with self.session_maker() as session:
+            yield session
+
+    @asynccontextmanager
+    async def _transaction(self):
+        """
+        Session for writes. Inside a unit of work changes are flushed
+        and committed with it, otherwise a separate transaction is used.
+        """
+        uow = _current_uow.get()
+        if uow is not None:
+            yield uow.session
+            await uow.session.flush()
+            return
+        async with self.session_maker() as session:
+            async with session.begin():
+                yield session
+
+    async def _keyset_page(
+        self,
+        stmt,
+        model,
+        limit: int,
+        before: tuple[datetime, int] | None = None,
+        after: tuple[datetime, int] | None = None
+    ):
+        """
+        One page of `stmt` rows ordered by (created_at, id), newest first.
+        `before`/`after` are keyset cursors of the last/first row
+        of the current page, so any page costs an index range scan.
+
+        Returns (rows, has_older, has_newer).
+        """
+        key = tuple_(model.created_at, model.id)
+        if after is not None:
+            page = stmt.where(key > tuple_(*after)).order_by(
+                model.created_at, model.id
+            )
+        else:
+            page = stmt.order_by(model.created_at.desc(), model.id.desc())
+            if before is not None:
+                page = page.where(key < tuple_(*before))
+
+        async with self._session() as session:
+            result = await session.execute(page.limit(limit + 1))
+            rows = list(result.scalars().all())
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        if after is None:
+            return rows, has_more, before is not None
+        if not has_more:
+            # Reached the newest rows: show a full first page
+            return await self._keyset_page(stmt, model, limit)
+        return rows[::-1], True, True
+
+    async def _notify(self, event: str, *args) -> None:
+        """
+        Call `event` method on every listener that defines it.
+        Inside a unit of work listeners are called after commit.
+        """
+        uow = _current_uow.get()
+        if uow is not None:
+            uow.after_commit(lambda: self._dispatch(event, *args))
+            return
+        await self._dispatch(event, *args)
+
+    async def _dispatch(self, event: str, *args) -> None:
+        for listener in self.listeners:
+            handler = getattr(listener, event, None)
+            if handler is None:
+                continue
+            try:
+                await handler(*args)
+            except Exception as e:
+                print(f"Ошибка обработчика события {event}: {e}")
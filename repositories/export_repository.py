@@ -0,0 +1,46 @@
+"""Repository for streaming a user's data for export"""
+from sqlalchemy import select
+from models import (
+    JournalEntry,
+    GoalEntry,
+    AnalysisEntry,
+    AIResponse,
+    AITextBlob
+)
+from .base import BaseRepository
+
+# Tables included in a user's data export
+EXPORT_MODELS = (JournalEntry, GoalEntry, AnalysisEntry, AIResponse)
+# Texts kept in ai_text_blobs are exported under these column names
+BLOB_TEXT_COLUMNS = {
+    AnalysisEntry: ('analysis', AnalysisEntry.analysis_hash),
+    AIResponse: ('ai_response', AIResponse.ai_response_hash),
+}
+
+
+class ExportRepository(BaseRepository):
+    """Repository for reading a user's rows through server-side cursors"""
+
+    async def stream_user_rows(
+        self, model, user_id: int, batch_size: int = 500
+    ):
+        """
+        Yield rows of `model` that belong to the user as lists of dicts.
+        Uses its own session with a server-side cursor, so memory
+        does not depend on the history size.
+        """
+        await self._sync_buffer(model, user_id)
+        stmt = select(*model.__table__.columns)
+        if model in BLOB_TEXT_COLUMNS:
+            name, hash_column = BLOB_TEXT_COLUMNS[model]
+            stmt = stmt.add_columns(
+                AITextBlob.content.label(name)
+            ).join(AITextBlob, AITextBlob.hash == hash_column)
+        stmt = stmt.where(model.user_id == user_id).order_by(model.id)
+        async with self.session_maker() as session:
+            result = await session.stream(
+                stmt,
+                execution_options={'yield_per': batch_size}
+            )
+            async for rows in result.mappings().partitions():
+                yield [dict(row) for row in rows]
@@ -1,67 +1,200 @@
 """Repository for GoalEntry operations"""
-from sqlalchemy import select, update, delete, cast, Date
-from models import GoalEntry
-from .base import BaseRepository
+from sqlalchemy import select, update, delete, cast, func, text, Date
+from sqlalchemy.dialects.postgresql import insert
+from models import GoalEntry, ActiveGoalUser
+from .base import BaseRepository, day_bounds
 
 
 class GoalRepository(BaseRepository):
     """Repository for managing goal entries"""
     
     async def add_goal(self, user_id, goal_text, result_text, target_date):
-        """Add a new goal entry"""
-        async with self.session_maker() as session:
-            async with session.begin():
-                entry = GoalEntry(
-                    user_id=user_id,
-                    goal_text=goal_text,
-                    result_text=result_text,
-                    target_date=target_date
-                )
-                session.add(entry)
+        """
+        Add a new goal entry.
+        Returns None if the user already has an active goal for that day.
+        """
+        stmt = self._insert_goal(
+            user_id, goal_text, result_text, target_date
+        ).on_conflict_do_nothing(
+            index_elements=self._active_day_key,
+            index_where=self._active_predicate
+        ).returning(GoalEntry)
+        async with self._transaction() as session:
+            entry = (await session.scalars(stmt)).first()
+            if entry is not None:
+                await self._mark_active(session, user_id, target_date)
+        if entry is not None:
+            await self._notify('on_goal_added', entry)
+        return entry
+
+    async def replace_goal(self, user_id, goal_text, result_text, target_date):
+        """Add a goal or replace the active goal of the user for that day"""
+        stmt = self._insert_goal(
+            user_id, goal_text, result_text, target_date
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=self._active_day_key,
+            index_where=self._active_predicate,
+            set_={
+                'goal_text': stmt.excluded.goal_text,
+                'result_text': stmt.excluded.result_text,
+                'target_date': stmt.excluded.target_date,
+                'created_at': func.now(),
+            }
+        ).returning(GoalEntry)
+        async with self._transaction() as session:
+            entry = (await session.scalars(
+                stmt,
+                execution_options={'populate_existing': True}
+            )).one()
+            await self._mark_active(session, user_id, target_date)
+        await self._notify('on_goal_added', entry)
+        return entry
+
+    # Matches the unique partial index uq_goal_entries_user_id_active_day.
+    # The predicate is a literal: a bound parameter would not let
+    # PostgreSQL infer the partial index in a prepared statement.
+    _active_day_key = [GoalEntry.user_id, cast(GoalEntry.target_date, Date)]
+    _active_predicate = text('is_completed = 0')
+
+    @staticmethod
+    async def _mark_active(session, user_id, target_date):
+        """Add the user to active_goal_users in the goal's transaction"""
+        stmt = insert(ActiveGoalUser).values(
+            user_id=user_id,
+            last_target_date=target_date
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ActiveGoalUser.user_id],
+            set_={
+                'last_target_date': func.greatest(
+                    ActiveGoalUser.last_target_date,
+                    stmt.excluded.last_target_date
+                ),
+                'updated_at': func.now(),
+            }
+        )
+        await session.execute(stmt)
+
+    @staticmethod
+    async def _refresh_active(session, user_id):
+        """Recompute active_goal_users row after goals were closed"""
+        last_target_date = await session.scalar(
+            select(func.max(GoalEntry.target_date)).where(
+                (GoalEntry.user_id == user_id) &
+                (GoalEntry.is_completed == 0)
+            )
+        )
+        if last_target_date is None:
+            stmt = delete(ActiveGoalUser).where(
+                ActiveGoalUser.user_id == user_id
+            )
+        else:
+            stmt = update(ActiveGoalUser).where(
+                ActiveGoalUser.user_id == user_id
+            ).values(
+                last_target_date=last_target_date,
+                updated_at=func.now()
+            )
+        await session.execute(
+            stmt.execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _insert_goal(user_id, goal_text, result_text, target_date):
+        return insert(GoalEntry).values(
+            user_id=user_id,
+            goal_text=goal_text,
+            result_text=result_text,
+            target_date=target_date
+        )
     
     async def get_goals(self, user_id: int, limit: int = 10):
         """Get recent goals for a user"""
-        async with self.session_maker() as session:
+        async with self._session() as session:
             stmt = select(GoalEntry).where(
                 GoalEntry.user_id == user_id
             ).order_by(GoalEntry.created_at.desc()).limit(limit)
             result = await session.execute(stmt)
             return result.scalars().all()
     
-    async def get_active_goals_for_date(self, target_date):
-        """Get all active goals for a specific date"""
-        async with self.session_maker() as session:
-            stmt = select(GoalEntry).where(
-                (cast(GoalEntry.target_date, Date) == target_date.date()) &
-                (GoalEntry.is_completed == 0)
+    async def get_goals_page(
+        self,
+        user_id: int,
+        limit: int = 10,
+        before=None,
+        after=None
+    ):
+        """
+        Get a page of goals, newest first, by keyset cursor
+        (created_at, id). Returns (goals, has_older, has_newer).
+        """
+        stmt = select(GoalEntry).where(GoalEntry.user_id == user_id)
+        return await self._keyset_page(
+            stmt, GoalEntry, limit, before, after
+        )
+    
+    async def get_pending_goals(self, since_date):
+        """Get all active goals with target date not earlier than since_date"""
+        async with self._session() as session:
+            result = await session.execute(
+                self._pending_goals_stmt(since_date)
             )
-            result = await session.execute(stmt)
             return result.scalars().all()
-    
+
+    @staticmethod
+    def _pending_goals_stmt(since_date):
+        since_start, _ = day_bounds(since_date)
+        return select(GoalEntry).where(
+            (GoalEntry.is_completed == 0) &
+            (GoalEntry.target_date >= since_start)
+        )
+
     async def get_user_goal_for_date(self, user_id: int, target_date):
         """Get active goal for a user on a specific date"""
-        async with self.session_maker() as session:
-            stmt = select(GoalEntry).where(
-                (GoalEntry.user_id == user_id) &
-                (cast(GoalEntry.target_date, Date) == target_date.date()) &
-                (GoalEntry.is_completed == 0)
-            ).order_by(GoalEntry.created_at.desc()).limit(1)
-            result = await session.execute(stmt)
+        async with self._session() as session:
+            result = await session.execute(
+                self._user_goal_for_date_stmt(user_id, target_date)
+            )
             return result.scalars().first()
+
+    @staticmethod
+    def _user_goal_for_date_stmt(user_id, target_date):
+        day_start, day_end = day_bounds(target_date)
+        return select(GoalEntry).where(
+            (GoalEntry.user_id == user_id) &
+            (GoalEntry.target_date >= day_start) &
+            (GoalEntry.target_date < day_end) &
+            (GoalEntry.is_completed == 0)
+        ).order_by(GoalEntry.created_at.desc()).limit(1)
     
     async def delete_goal(self, goal_id: int):
         """Delete a goal by ID"""
-        async with self.session_maker() as session:
-            async with session.begin():
-                stmt = delete(GoalEntry).where(GoalEntry.id == goal_id)
-                await session.execute(stmt)
+        async with self._transaction() as session:
+            stmt = delete(GoalEntry).where(
+                GoalEntry.id == goal_id
+            ).returning(GoalEntry.user_id)
+            user_id = await session.scalar(stmt)
+            if user_id is not None:
+                await self._refresh_active(session, user_id)
+        await self._notify('on_goal_deleted', goal_id)
     
     async def update_goal_status(self, goal_id, is_completed: int):
         """Update goal completion status"""
-        async with self.session_maker() as session:
-            async with session.begin():
-                stmt = update(GoalEntry).where(
-                    GoalEntry.id == goal_id
-                ).values(is_completed=is_completed)
-                await session.execute(stmt)
+        async with self._transaction() as session:
+            stmt = update(GoalEntry).where(
+                GoalEntry.id == goal_id
+            ).values(is_completed=is_completed).returning(GoalEntry.user_id)
+            user_id = await session.scalar(stmt)
+            if user_id is not None:
+                await self._refresh_active(session, user_id)
+        await self._notify('on_goal_status_changed', goal_id, is_completed)
 
+    async def delete_inactive_users(self, before) -> None:
+        """Drop users whose latest active goal is older than `before`"""
+        async with self._transaction() as session:
+            await session.execute(
+                delete(ActiveGoalUser).where(
+                    ActiveGoalUser.last_target_date < before
+                )
+            )
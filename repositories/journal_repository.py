@@ -1,36 +1,143 @@
 """Repository for JournalEntry operations"""
-from sqlalchemy import select
-from models import JournalEntry
+import json
+from datetime import date, datetime
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from models import JournalEntry, TriggerRollup
 from .base import BaseRepository
 
+# Rollup dimension -> entry fields it is keyed by
+ROLLUP_DIMENSIONS = {
+    'emotion': ('emotion',),
+    'location': ('location',),
+    'company': ('company',),
+    'emotion+location': ('emotion', 'location'),
+    'emotion+company': ('emotion', 'company'),
+    'location+company': ('location', 'company'),
+    'emotion+location+company': ('emotion', 'location', 'company'),
+}
+
+
+def rollup_key(parts) -> str:
+    """
+    Rollup key of dimension values: the value itself, or a JSON array
+    for combined dimensions (custom answers may contain any separator)
+    """
+    if len(parts) == 1:
+        return parts[0]
+    return json.dumps(list(parts), ensure_ascii=False)
+
+
+def split_rollup_key(dimension: str, key: str) -> tuple:
+    """Dimension values of a rollup key"""
+    if len(ROLLUP_DIMENSIONS.get(dimension, ())) > 1:
+        return tuple(json.loads(key))
+    return (key,)
+
+
+def format_rollup_key(dimension: str, key: str) -> str:
+    """Rollup key for display: values joined with " + " """
+    return ' + '.join(split_rollup_key(dimension, key))
+
+
+def rollup_keys(values: dict, local_time: datetime) -> list[tuple]:
+    """
+    (dimension, key) pairs an entry is counted under. The hour bucket
+    is taken from the user's local time of the entry.
+    """
+    keys = [('hour', str(local_time.hour))]
+    for dimension, fields in ROLLUP_DIMENSIONS.items():
+        if all(values[field] is not None for field in fields):
+            keys.append((
+                dimension,
+                rollup_key([values[field] for field in fields])
+            ))
+    return keys
+
 
 class JournalRepository(BaseRepository):
     """Repository for managing journal entries"""
     
-    async def add_entry(self, user_id, emotion, location, company):
-        """Add a new journal entry"""
-        async with self.session_maker() as session:
-            async with session.begin():
-                entry = JournalEntry(
-                    user_id=user_id,
-                    emotion=emotion,
-                    location=location,
-                    company=company
-                )
-                session.add(entry)
+    async def add_entry(
+        self,
+        user_id,
+        emotion,
+        location,
+        company,
+        local_time: datetime | None = None
+    ):
+        """
+        Add a new journal entry and count it in the trigger rollups.
+        Rollups are bucketed by the user's local time of the entry
+        (`local_time`, server time if not given).
+        """
+        values = {
+            'user_id': user_id,
+            'emotion': emotion,
+            'location': location,
+            'company': company,
+            'created_at': datetime.now(),
+        }
+        local_time = local_time or values['created_at']
+        rollups = [
+            {
+                'user_id': user_id,
+                'day': local_time.date(),
+                'dimension': dimension,
+                'key': key,
+            }
+            for dimension, key in rollup_keys(values, local_time)
+        ]
+        if self.write_buffer is not None:
+            await self._buffer_writes(
+                [(JournalEntry, values)],
+                [(TriggerRollup, rollup, 'count') for rollup in rollups]
+            )
+            return
+        async with self._transaction() as session:
+            session.add(JournalEntry(**values))
+            stmt = insert(TriggerRollup)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(
+                    TriggerRollup.__table__.primary_key.columns
+                ),
+                set_={'count': TriggerRollup.count + stmt.excluded['count']}
+            )
+            await session.execute(
+                stmt, [{**rollup, 'count': 1} for rollup in rollups]
+            )
     
     async def get_entries(self, user_id: int, limit: int = 10):
         """Get recent journal entries for a user"""
-        async with self.session_maker() as session:
+        await self._sync_buffer(JournalEntry, user_id)
+        async with self._session() as session:
             stmt = select(JournalEntry).where(
                 JournalEntry.user_id == user_id
             ).order_by(JournalEntry.created_at.desc()).limit(limit)
             result = await session.execute(stmt)
             return result.scalars().all()
     
+    async def get_entries_page(
+        self,
+        user_id: int,
+        limit: int = 10,
+        before=None,
+        after=None
+    ):
+        """
+        Get a page of journal entries, newest first, by keyset cursor
+        (created_at, id). Returns (entries, has_older, has_newer).
+        """
+        await self._sync_buffer(JournalEntry, user_id)
+        stmt = select(JournalEntry).where(JournalEntry.user_id == user_id)
+        return await self._keyset_page(
+            stmt, JournalEntry, limit, before, after
+        )
+    
     async def get_entries_since(self, user_id: int, since_date):
         """Get journal entries since a specific date"""
-        async with self.session_maker() as session:
+        await self._sync_buffer(JournalEntry, user_id)
+        async with self._session() as session:
             stmt = select(JournalEntry).where(
                 (JournalEntry.user_id == user_id) & 
                 (JournalEntry.created_at >= since_date)
@@ -38,3 +145,75 @@ class JournalRepository(BaseRepository):
             result = await session.execute(stmt)
             return result.scalars().all()
 
+
+    async def get_entries_stats(
+        self,
+        user_id: int,
+        since_date,
+        after_id: int | None = None
+    ):
+        """
+        Count journal entries since a date without loading them.
+        Returns (count, count with id > after_id, max id).
+        """
+        await self._sync_buffer(JournalEntry, user_id)
+        async with self._session() as session:
+            result = await session.execute(
+                self._entries_stats_stmt(user_id, since_date, after_id)
+            )
+            return tuple(result.one())
+
+    @staticmethod
+    def _entries_stats_stmt(user_id, since_date, after_id=None):
+        new_entries = func.count()
+        if after_id is not None:
+            new_entries = new_entries.filter(JournalEntry.id > after_id)
+        return select(
+            func.count(),
+            new_entries,
+            func.max(JournalEntry.id)
+        ).where(
+            (JournalEntry.user_id == user_id) &
+            (JournalEntry.created_at >= since_date)
+        )
+    
+    async def get_rollups(self, user_id: int, since_day: date):
+        """
+        Get trigger counters since a day, summed per (dimension, key).
+        Returns a list of (dimension, key, count), most frequent first.
+        """
+        await self._sync_buffer(TriggerRollup, user_id)
+        async with self._session() as session:
+            total = func.sum(TriggerRollup.count)
+            stmt = select(
+                TriggerRollup.dimension,
+                TriggerRollup.key,
+                total
+            ).where(
+                (TriggerRollup.user_id == user_id) &
+                (TriggerRollup.day >= since_day)
+            ).group_by(
+                TriggerRollup.dimension,
+                TriggerRollup.key
+            ).order_by(total.desc(), TriggerRollup.key)
+            result = await session.execute(stmt)
+            return [tuple(row) for row in result.all()]
+    
+    async def get_daily_rollups(self, user_id: int, since_day: date):
+        """
+        Get trigger counters since a day, one row per day.
+        Returns a list of (day, dimension, key, count).
+        """
+        await self._sync_buffer(TriggerRollup, user_id)
+        async with self._session() as session:
+            stmt = select(
+                TriggerRollup.day,
+                TriggerRollup.dimension,
+                TriggerRollup.key,
+                TriggerRollup.count
+            ).where(
+                (TriggerRollup.user_id == user_id) &
+                (TriggerRollup.day >= since_day)
+            ).order_by(TriggerRollup.day)
+            result = await session.execute(stmt)
+            return [tuple(row) for row in result.all()]
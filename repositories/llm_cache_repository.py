@@ -0,0 +1,54 @@
+"""Repository for the persistent LLM response cache"""
+from datetime import datetime
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from models import LLMCacheEntry
+from .base import BaseRepository
+
+
+class LLMCacheRepository(BaseRepository):
+    """Repository for cached LLM responses"""
+
+    async def get_response(self, key: str, now: datetime):
+        """Get a cached response, None if missing or expired"""
+        async with self._session() as session:
+            stmt = select(
+                LLMCacheEntry.response,
+                LLMCacheEntry.expires_at
+            ).where(
+                (LLMCacheEntry.key == key) &
+                (LLMCacheEntry.expires_at > now)
+            )
+            result = await session.execute(stmt)
+            return result.one_or_none()
+
+    async def save_response(
+        self,
+        key: str,
+        feature: str,
+        response: str,
+        expires_at: datetime
+    ) -> None:
+        """Store a response, replacing an older one with the same key"""
+        async with self._transaction() as session:
+            stmt = insert(LLMCacheEntry).values(
+                key=key,
+                feature=feature,
+                response=response,
+                expires_at=expires_at
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[LLMCacheEntry.key],
+                set_={
+                    'response': stmt.excluded.response,
+                    'expires_at': stmt.excluded.expires_at,
+                }
+            )
+            await session.execute(stmt)
+
+    async def delete_expired(self, now: datetime) -> None:
+        """Delete responses past their TTL"""
+        async with self._transaction() as session:
+            await session.execute(
+                delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= now)
+            )
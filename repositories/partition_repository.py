@@ -0,0 +1,81 @@
+"""Repository for maintenance of monthly table partitions"""
+import re
+from datetime import date
+from sqlalchemy import text
+from .base import BaseRepository
+
+# Tables partitioned by RANGE (created_at), one partition per month
+PARTITIONED_TABLES = ('journal_entries', 'ai_responses')
+
+# Texts kept in ai_text_blobs are added to archived rows
+_ARCHIVE_TEXT_JOINS = {
+    'ai_responses': (
+        ", blob.content AS ai_response",
+        " LEFT JOIN ai_text_blobs blob ON blob.hash = p.ai_response_hash"
+    ),
+}
+
+_PARTITION_SUFFIX = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def partition_name(table: str, month_start: date) -> str:
+    return f'{table}_p{month_start:%Y_%m}'
+
+
+class PartitionRepository(BaseRepository):
+    """Repository for creating, listing and dropping monthly partitions"""
+
+    async def create_partition(
+        self, table: str, month_start: date, month_end: date
+    ) -> None:
+        """Create the partition of `table` for [month_start, month_end)"""
+        async with self._transaction() as session:
+            await session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS "
+                f"{partition_name(table, month_start)} "
+                f"PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month_start}') TO ('{month_end}')"
+            ))
+
+    async def get_partitions(self, table: str) -> list[tuple[str, date]]:
+        """Get monthly partitions of `table` as (name, month start)"""
+        async with self._session() as session:
+            result = await session.execute(
+                text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+                ),
+                {'table': table}
+            )
+            partitions = []
+            for name in result.scalars().all():
+                match = _PARTITION_SUFFIX.search(name)
+                if match:
+                    year, month = map(int, match.groups())
+                    partitions.append((name, date(year, month, 1)))
+            return sorted(partitions, key=lambda partition: partition[1])
+
+    async def stream_rows(
+        self, table: str, partition: str, batch_size: int = 1000
+    ):
+        """Yield rows of a partition of `table` as lists of dicts"""
+        columns, join = _ARCHIVE_TEXT_JOINS.get(table, ('', ''))
+        async with self.session_maker() as session:
+            result = await session.stream(
+                text(
+                    f"SELECT p.*{columns} FROM {partition} p{join} "
+                    f"ORDER BY p.id"
+                ),
+                execution_options={'yield_per': batch_size}
+            )
+            async for rows in result.mappings().partitions(batch_size):
+                yield [dict(row) for row in rows]
+
+    async def drop_partition(self, table: str, partition: str) -> None:
+        """Detach a partition from `table` and drop it"""
+        async with self._transaction() as session:
+            await session.execute(
+                text(f"ALTER TABLE {table} DETACH PARTITION {partition}")
+            )
+            await session.execute(text(f"DROP TABLE {partition}"))
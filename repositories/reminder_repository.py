@@ -0,0 +1,243 @@
+"""Repository for reminder delivery operations"""
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, update, delete, bindparam, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from models import UserSettings, GoalEntry, SentReminder
+from .base import BaseRepository, day_bounds
+
+
+class ReminderRepository(BaseRepository):
+    """
+    Repository for claiming due reminders and the sent-reminder ledger.
+
+    A ledger row is written with a lease when a reminder is queued and
+    marked sent after the message is delivered. If the sender dies
+    before that, the lease expires and another scheduler run sends the
+    reminder again, up to `max_attempts` times.
+    """
+
+    async def claim_due_reminders(
+        self,
+        now: datetime,
+        limit: int,
+        plan,
+        lease_until: datetime,
+        max_attempts: int
+    ):
+        """
+        Claim up to `limit` users with due reminders and lease them
+        in the ledger within one transaction.
+
+        Rows are locked with FOR UPDATE SKIP LOCKED, so concurrent
+        scheduler instances claim disjoint batches.
+        `plan(due_settings, goals)` must return
+        (schedule, reminders): schedule is {user_id: (next_fire_at, type)},
+        reminders is a list of (goal, reminder_type, local_date).
+
+        Returns (claimed_count, reminders leased by this call).
+        """
+        async with self._transaction() as session:
+            stmt = select(UserSettings).where(
+                UserSettings.next_fire_at <= now
+            ).order_by(
+                UserSettings.next_fire_at
+            ).limit(limit).with_for_update(skip_locked=True)
+            result = await session.execute(stmt)
+            due_settings = list(result.scalars().all())
+            if not due_settings:
+                return 0, []
+
+            goals = await self._active_goals(
+                session,
+                [s.user_id for s in due_settings],
+                now
+            )
+            schedule, reminders = plan(due_settings, goals)
+
+            stmt = update(UserSettings).where(
+                UserSettings.user_id == bindparam('b_user_id')
+            ).values(
+                next_fire_at=bindparam('b_next_fire_at'),
+                next_reminder_type=bindparam('b_reminder_type')
+            )
+            await session.execute(stmt, [
+                {
+                    'b_user_id': user_id,
+                    'b_next_fire_at': next_fire_at,
+                    'b_reminder_type': reminder_type,
+                }
+                for user_id, (next_fire_at, reminder_type)
+                in schedule.items()
+            ])
+
+            if not reminders:
+                return len(due_settings), []
+            leased = await self._lease(
+                session,
+                {
+                    (goal.user_id, reminder_type, local_date)
+                    for goal, reminder_type, local_date in reminders
+                },
+                now,
+                lease_until,
+                max_attempts
+            )
+            return len(due_settings), [
+                (goal, reminder_type, local_date)
+                for goal, reminder_type, local_date in reminders
+                if (goal.user_id, reminder_type, local_date) in leased
+            ]
+
+    async def lease_reminder(
+        self,
+        user_id: int,
+        reminder_type: str,
+        local_date: date,
+        now: datetime,
+        lease_until: datetime,
+        max_attempts: int
+    ) -> bool:
+        """
+        Lease a reminder for sending until `lease_until`.
+        False if it was already sent or is leased by someone else.
+        """
+        async with self._transaction() as session:
+            leased = await self._lease(
+                session,
+                {(user_id, reminder_type, local_date)},
+                now,
+                lease_until,
+                max_attempts
+            )
+            return bool(leased)
+
+    async def claim_expired_leases(
+        self,
+        now: datetime,
+        lease_until: datetime,
+        max_attempts: int,
+        limit: int
+    ) -> list[tuple]:
+        """
+        Re-lease reminders whose sender did not confirm delivery before
+        its lease expired (e.g. the process crashed while sending).
+
+        Returns reminders to send again as (goal, reminder_type, local_date).
+        """
+        async with self._transaction() as session:
+            expired = select(
+                SentReminder.user_id,
+                SentReminder.reminder_type,
+                SentReminder.local_date
+            ).where(
+                SentReminder.sent_at.is_(None) &
+                (SentReminder.lease_until < now) &
+                (SentReminder.attempts < max_attempts)
+            ).limit(limit).with_for_update(skip_locked=True)
+            stmt = update(SentReminder).where(
+                tuple_(
+                    SentReminder.user_id,
+                    SentReminder.reminder_type,
+                    SentReminder.local_date
+                ).in_(expired)
+            ).values(
+                lease_until=lease_until,
+                attempts=SentReminder.attempts + 1
+            ).returning(
+                SentReminder.user_id,
+                SentReminder.reminder_type,
+                SentReminder.local_date
+            )
+            result = await session.execute(stmt)
+            keys = [tuple(row) for row in result.all()]
+            if not keys:
+                return []
+
+            goals = await self._active_goals(
+                session,
+                list({user_id for user_id, _, _ in keys}),
+                now
+            )
+            return [
+                (goal, reminder_type, local_date)
+                for user_id, reminder_type, local_date in keys
+                for goal in goals
+                if goal.user_id == user_id
+                and goal.target_date.date() == local_date
+            ]
+
+    async def mark_sent(
+        self,
+        user_id: int,
+        reminder_type: str,
+        local_date: date,
+        sent_at: datetime
+    ) -> None:
+        """Confirm delivery of a leased reminder"""
+        async with self._transaction() as session:
+            stmt = update(SentReminder).where(
+                (SentReminder.user_id == user_id) &
+                (SentReminder.reminder_type == reminder_type) &
+                (SentReminder.local_date == local_date)
+            ).values(sent_at=sent_at, lease_until=None)
+            await session.execute(stmt)
+
+    async def _active_goals(self, session, user_ids, now: datetime):
+        """Active goals of the users from yesterday on"""
+        stmt = select(GoalEntry).where(
+            (GoalEntry.user_id.in_(user_ids)) &
+            (GoalEntry.target_date >=
+             day_bounds(now - timedelta(days=1))[0]) &
+            (GoalEntry.is_completed == 0)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def _lease(
+        self,
+        session,
+        keys,
+        now: datetime,
+        lease_until: datetime,
+        max_attempts: int
+    ) -> set:
+        """
+        Insert ledger rows with a lease. An existing row is leased
+        again only if it is unsent and its lease has expired.
+        Returns the keys leased by this call.
+        """
+        stmt = insert(SentReminder).values([
+            {
+                'user_id': user_id,
+                'reminder_type': reminder_type,
+                'local_date': local_date,
+                'lease_until': lease_until,
+            }
+            for user_id, reminder_type, local_date in keys
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(SentReminder.__table__.primary_key.columns),
+            set_={
+                'lease_until': stmt.excluded.lease_until,
+                'attempts': SentReminder.attempts + 1,
+            },
+            where=(
+                SentReminder.sent_at.is_(None) &
+                (SentReminder.lease_until < now) &
+                (SentReminder.attempts < max_attempts)
+            )
+        ).returning(
+            SentReminder.user_id,
+            SentReminder.reminder_type,
+            SentReminder.local_date
+        )
+        result = await session.execute(stmt)
+        return {tuple(row) for row in result.all()}
+
+    async def delete_sent_before(self, local_date: date) -> None:
+        """Delete ledger rows older than local_date"""
+        async with self._transaction() as session:
+            stmt = delete(SentReminder).where(
+                SentReminder.local_date < local_date
+            )
+            await session.execute(stmt)
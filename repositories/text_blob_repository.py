@@ -0,0 +1,42 @@
+"""Repository for content-addressed AI output texts"""
+from hashlib import sha256
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from models import AITextBlob, AIResponse, AnalysisEntry
+from .base import BaseRepository
+
+
+def text_hash(text: str) -> str:
+    """sha256 of the UTF-8 text in hex, the key of ai_text_blobs"""
+    return sha256(text.encode('utf-8')).hexdigest()
+
+
+def insert_text(text: str):
+    """
+    Return (hash, statement) inserting the text unless it is stored
+    already. Run the statement in the transaction of the referencing row.
+    """
+    blob_hash = text_hash(text)
+    stmt = insert(AITextBlob).values(
+        hash=blob_hash,
+        content=text
+    ).on_conflict_do_nothing()
+    return blob_hash, stmt
+
+
+class TextBlobRepository(BaseRepository):
+    """Repository for texts shared by ai_responses and analysis_entries"""
+
+    async def delete_orphans(self) -> None:
+        """Delete texts no longer referenced, e.g. after partition drops"""
+        async with self._transaction() as session:
+            await session.execute(
+                delete(AITextBlob).where(
+                    ~exists(select(AIResponse.id).where(
+                        AIResponse.ai_response_hash == AITextBlob.hash
+                    )) &
+                    ~exists(select(AnalysisEntry.id).where(
+                        AnalysisEntry.analysis_hash == AITextBlob.hash
+                    ))
+                )
+            )
@@ -1,7 +1,9 @@
 """Repository for UserSettings operations"""
+from datetime import datetime, time
 from typing import Optional, List
-from sqlalchemy import select, distinct
-from models import UserSettings, GoalEntry
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from models import UserSettings, ActiveGoalUser
 from .base import BaseRepository
 
 
@@ -10,73 +12,97 @@ class UserRepository(BaseRepository):
 
     async def get_user_settings(self, user_id: int) -> Optional[UserSettings]:
         """Get user settings by user ID"""
-        async with self.session_maker() as session:
+        async with self._session() as session:
+            # Settings may have been changed by an upsert in this session
             stmt = select(UserSettings).where(
                 UserSettings.user_id == user_id
-            )
+            ).execution_options(populate_existing=True)
             result = await session.execute(stmt)
             return result.scalars().first()
 
     async def set_user_timezone(self, user_id: int, timezone: str) -> None:
         """Set or update user timezone (upsert operation)"""
-        async with self.session_maker() as session:
-            async with session.begin():
-                stmt = select(UserSettings).where(
-                    UserSettings.user_id == user_id
-                )
-                result = await session.execute(stmt)
-                existing = result.scalars().first()
+        await self._upsert(user_id, timezone=timezone)
+        await self._notify('on_user_settings_changed', user_id)
+
+    async def set_reminder_times(
+        self,
+        user_id: int,
+        morning_time: Optional[time] = None,
+        evening_time: Optional[time] = None
+    ) -> None:
+        """Set morning and/or evening reminder time (upsert operation)"""
+        values = {}
+        if morning_time is not None:
+            values['morning_time'] = morning_time
+        if evening_time is not None:
+            values['evening_time'] = evening_time
+
+        await self._upsert(user_id, **values)
+        await self._notify('on_user_settings_changed', user_id)
+
+    async def set_next_reminder(
+        self,
+        user_id: int,
+        next_fire_at: Optional[datetime],
+        reminder_type: Optional[str]
+    ) -> None:
+        """Set next reminder time of a user (upsert operation)"""
+        await self._upsert(
+            user_id,
+            next_fire_at=next_fire_at,
+            next_reminder_type=reminder_type
+        )
 
-                if existing:
-                    existing.timezone = timezone
-                else:
-                    settings = UserSettings(
-                        user_id=user_id,
-                        timezone=timezone
-                    )
-                    session.add(settings)
+    async def _upsert(self, user_id: int, **values) -> None:
+        """Insert settings row or update given columns in one statement"""
+        stmt = insert(UserSettings).values(user_id=user_id, **values)
+        if values:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserSettings.user_id],
+                set_={**values, 'updated_at': func.now()}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(
+                index_elements=[UserSettings.user_id]
+            )
+        async with self._transaction() as session:
+            await session.execute(stmt)
+
+    async def get_users_without_schedule(self, since_date) -> List[int]:
+        """Get IDs of users with active goals but no next reminder time"""
+        async with self._session() as session:
+            stmt = select(ActiveGoalUser.user_id).outerjoin(
+                UserSettings,
+                UserSettings.user_id == ActiveGoalUser.user_id
+            ).where(
+                (ActiveGoalUser.last_target_date >= since_date) &
+                (UserSettings.next_fire_at.is_(None))
+            )
+            result = await session.execute(stmt)
+            return list(result.scalars().all())
 
     async def get_all_users_with_timezone(self) -> List[UserSettings]:
         """Get all users with timezone set"""
-        async with self.session_maker() as session:
+        async with self._session() as session:
             stmt = select(UserSettings).where(
                 UserSettings.timezone.isnot(None)
             )
             result = await session.execute(stmt)
             return list(result.scalars().all())
 
-    def _create_default_settings(self, user_id: int) -> UserSettings:
-        """Factory method to create UserSettings with default values"""
-        return UserSettings(
-            user_id=user_id,
-            timezone=None
-        )
-
-    async def get_all_users_with_goals(self) -> List[UserSettings]:
-        """
-        Get all users who have goals.
-        Returns UserSettings for each user
-        (creates default settings if not exists).
-        """
-        async with self.session_maker() as session:
-            stmt_goals = select(distinct(GoalEntry.user_id))
-            result_goals = await session.execute(stmt_goals)
-            user_ids = list(result_goals.scalars().all())
-
-            if not user_ids:
-                return []
-
-            stmt_settings = select(UserSettings).where(
+    async def get_settings_for_users(
+        self, user_ids: List[int]
+    ) -> dict[int, UserSettings]:
+        """Get settings of the given users keyed by user ID"""
+        if not user_ids:
+            return {}
+        async with self._session() as session:
+            stmt = select(UserSettings).where(
                 UserSettings.user_id.in_(user_ids)
             )
-            result_settings = await session.execute(stmt_settings)
-            existing_settings = {
+            result = await session.execute(stmt)
+            return {
                 settings.user_id: settings
-                for settings in result_settings.scalars().all()
+                for settings in result.scalars().all()
             }
-
-            return [
-                existing_settings.get(user_id)
-                or self._create_default_settings(user_id)
-                for user_id in user_ids
-            ]
@@ -0,0 +1,390 @@
+"""Write-behind buffer for append-only inserts"""
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+
+def _is_data_error(error: Exception) -> bool:
+    """
+    True for errors caused by the rows themselves (too long value,
+    constraint violation), False for connection problems
+    """
+    return (
+        isinstance(error, DBAPIError)
+        and not isinstance(error, (OperationalError, InterfaceError))
+        and not error.connection_invalidated
+    )
+
+
+class WriteBehindBuffer:
+    """
+    Collects rows from many concurrent updates and inserts them
+    in batches: one transaction per flush instead of one per row.
+
+    Counter increments are summed per row key in memory and written
+    as INSERT ... ON CONFLICT DO UPDATE SET count = count + excluded.count.
+
+    A flush happens when `max_rows` rows are pending, every
+    `flush_interval` seconds and on shutdown. Before a read only the
+    rows of the user being read are flushed.
+
+    If a batch is rejected because of its data, it is retried in
+    halves to isolate the offending rows; those are retried up to
+    `max_attempts` flushes and then dropped. Rows whose ID was already
+    handed out and rows other buffered tables reference are never
+    dropped, they stay queued. On connection errors the whole batch
+    stays queued.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        max_rows: int = 200,
+        flush_interval: float = 1.0,
+        id_block_size: int = 50,
+        max_attempts: int = 3
+    ):
+        self.session_maker = session_maker
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.id_block_size = id_block_size
+        self.max_attempts = max_attempts
+        self._pending: dict[type, list[dict]] = {}
+        self._models: set = set()
+        self._ids: dict[type, list[int]] = {}
+        # model -> {row key: increment}, model -> counter column
+        self._counters: dict[type, dict[tuple, int]] = {}
+        self._counter_columns: dict[type, str] = {}
+        # Failed flushes per row that failed on its own
+        self._attempts: dict = {}
+        self._flush_lock = asyncio.Lock()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_dropped = 0
+
+    @property
+    def pending_count(self) -> int:
+        return (
+            sum(len(rows) for rows in self._pending.values())
+            + sum(len(keys) for keys in self._counters.values())
+        )
+
+    def add(self, model, values: dict) -> None:
+        """Queue a row for insertion"""
+        self._models.add(model)
+        self._pending.setdefault(model, []).append(values)
+        if self.pending_count >= self.max_rows:
+            self._full.set()
+
+    def increment(
+        self, model, key: dict, column: str, amount: int = 1
+    ) -> None:
+        """Queue `column += amount` for the row with primary key `key`"""
+        self._models.add(model)
+        self._counter_columns[model] = column
+        counters = self._counters.setdefault(model, {})
+        row_key = tuple(sorted(key.items()))
+        counters[row_key] = counters.get(row_key, 0) + amount
+        if self.pending_count >= self.max_rows:
+            self._full.set()
+
+    def has_pending(self, model, user_id: int | None = None) -> bool:
+        """True if rows of `model` (of one user, if given) are queued"""
+        if user_id is None:
+            return bool(
+                self._pending.get(model) or self._counters.get(model)
+            )
+        return any(
+            row.get('user_id') == user_id
+            for row in self._pending.get(model, ())
+        ) or any(
+            dict(row_key).get('user_id') == user_id
+            for row_key in self._counters.get(model, ())
+        )
+
+    def update_pending(self, model, row_id: int, values: dict) -> bool:
+        """Update a row that has not been flushed yet"""
+        for row in self._pending.get(model, ()):
+            if row.get('id') == row_id:
+                row.update(values)
+                return True
+        return False
+
+    async def wait_flushed(self) -> None:
+        """Wait until a flush in progress, if any, is committed"""
+        async with self._flush_lock:
+            pass
+
+    async def next_id(self, model) -> int:
+        """
+        Allocate a primary key from the table sequence, so the caller
+        gets an ID before the row is written. IDs are fetched in blocks.
+        """
+        ids = self._ids.setdefault(model, [])
+        if not ids:
+            async with self.session_maker() as session:
+                result = await session.execute(
+                    text(
+                        "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                        "FROM generate_series(1, :count)"
+                    ),
+                    {
+                        'table': model.__tablename__,
+                        'count': self.id_block_size,
+                    }
+                )
+                ids.extend(result.scalars().all())
+        return ids.pop(0)
+
+    def _take_all(self):
+        pending, self._pending = self._pending, {}
+        counters, self._counters = self._counters, {}
+        self._full.clear()
+        return pending, counters
+
+    def _take_user(self, user_id: int):
+        """
+        Take the user's rows and all rows of tables without user_id
+        (text blobs), which the user's rows may reference
+        """
+        pending = {}
+        for model, rows in list(self._pending.items()):
+            if 'user_id' not in model.__table__.c:
+                pending[model] = self._pending.pop(model)
+                continue
+            taken = [row for row in rows if row.get('user_id') == user_id]
+            if taken:
+                pending[model] = taken
+                self._pending[model] = [
+                    row for row in rows if row.get('user_id') != user_id
+                ]
+        counters = {}
+        for model, increments in self._counters.items():
+            taken = {
+                row_key: amount
+                for row_key, amount in increments.items()
+                if dict(row_key).get('user_id') == user_id
+            }
+            if taken:
+                counters[model] = taken
+                for row_key in taken:
+                    del increments[row_key]
+        return pending, counters
+
+    async def flush(self, user_id: int | None = None) -> None:
+        """
+        Insert pending rows in one transaction: all of them or only
+        those of one user
+        """
+        async with self._flush_lock:
+            if user_id is None:
+                pending, counters = self._take_all()
+            else:
+                pending, counters = self._take_user(user_id)
+            if not pending and not counters:
+                return
+            batches = [
+                (model, pending[model], False)
+                for model in self._insert_order(pending)
+            ] + [
+                (model, list(increments.items()), True)
+                for model, increments in counters.items()
+            ]
+            try:
+                async with self.session_maker() as session:
+                    async with session.begin():
+                        for model, items, is_counter in batches:
+                            await self._write(
+                                session, model, items, is_counter
+                            )
+            except Exception as e:
+                print(f"Ошибка пакетной записи в БД: {e}")
+                if _is_data_error(e):
+                    # Плохая строка не должна блокировать остальные
+                    await self._write_isolated(batches)
+                else:
+                    # БД недоступна: пробуем весь пакет на следующем flush
+                    for model, items, is_counter in batches:
+                        self._requeue(model, items, is_counter)
+            else:
+                self.flushes += 1
+                self.rows_written += sum(
+                    len(items) for _, items, _ in batches
+                )
+            self._forget_attempts()
+
+    @staticmethod
+    def _insert_order(pending) -> list:
+        # Referenced tables (text blobs) go first
+        return sorted(
+            pending,
+            key=lambda m: bool(m.__table__.foreign_keys)
+        )
+
+    async def _write(self, session, model, items, is_counter) -> None:
+        if is_counter:
+            await self._write_counters(session, model, dict(items))
+        else:
+            stmt = insert(model.__table__).on_conflict_do_nothing()
+            await session.execute(stmt, items)
+
+    async def _write_isolated(self, batches) -> None:
+        """
+        Write the batches chunk by chunk, halving a chunk that fails,
+        so only the rows that fail on their own are held back.
+        """
+        for i, (model, items, is_counter) in enumerate(batches):
+            failed, unwritten = await self._write_split(
+                model, items, is_counter
+            )
+            for item in failed:
+                self._retry_failed(model, item, is_counter)
+            if unwritten:
+                # DB went away meanwhile: keep the rest for the next flush
+                self._requeue(model, unwritten, is_counter)
+                for model, items, is_counter in batches[i + 1:]:
+                    self._requeue(model, items, is_counter)
+                return
+
+    async def _write_split(self, model, items, is_counter):
+        """
+        Returns (items failing alone, items not tried because of
+        a connection error).
+        """
+        failed = []
+        chunks = [items]
+        while chunks:
+            chunk = chunks.pop()
+            try:
+                async with self.session_maker() as session:
+                    async with session.begin():
+                        await self._write(session, model, chunk, is_counter)
+            except Exception as e:
+                if not _is_data_error(e):
+                    return failed, [
+                        item for c in (chunk, *chunks) for item in c
+                    ]
+                if len(chunk) == 1:
+                    print(
+                        f"Строка {model.__tablename__} не записана: {e}"
+                    )
+                    failed.extend(chunk)
+                else:
+                    middle = len(chunk) // 2
+                    chunks.append(chunk[middle:])
+                    chunks.append(chunk[:middle])
+                continue
+            self.rows_written += len(chunk)
+        return failed, []
+
+    def _attempt_key(self, model, item, is_counter):
+        # Counter rows are identified by their key, plain rows by object
+        return (model, item[0]) if is_counter else id(item)
+
+    def _is_referenced(self, model) -> bool:
+        """True if another buffered table has a foreign key to `model`"""
+        return any(
+            fk.references(model.__table__)
+            for other in self._models
+            for fk in other.__table__.foreign_keys
+        )
+
+    def _retry_failed(self, model, item, is_counter) -> None:
+        """
+        Requeue a row that failed alone. After max_attempts it is
+        dropped, unless its ID was handed out or other rows need it.
+        """
+        key = self._attempt_key(model, item, is_counter)
+        attempts = self._attempts.get(key, 0) + 1
+        keep = not is_counter and (
+            'id' in item or self._is_referenced(model)
+        )
+        if attempts >= self.max_attempts and not keep:
+            self._attempts.pop(key, None)
+            self.rows_dropped += 1
+            print(
+                f"Строка {model.__tablename__} отброшена после "
+                f"{attempts} попыток: {item}"
+            )
+            return
+        if attempts == self.max_attempts:
+            # The caller already holds the ID (e.g. in a rating
+            # keyboard) or other rows reference it: never drop
+            print(
+                f"Строка {model.__tablename__} не записана после "
+                f"{attempts} попыток, остается в очереди: {item}"
+            )
+        self._attempts[key] = attempts
+        self._requeue(model, [item], is_counter)
+
+    def _requeue(self, model, items, is_counter) -> None:
+        if is_counter:
+            queued = self._counters.setdefault(model, {})
+            for row_key, amount in items:
+                queued[row_key] = queued.get(row_key, 0) + amount
+        else:
+            self._pending[model] = [*items, *self._pending.get(model, [])]
+
+    def _forget_attempts(self) -> None:
+        """Drop attempt counters of rows that are no longer queued"""
+        if not self._attempts:
+            return
+        queued = {
+            id(row) for rows in self._pending.values() for row in rows
+        } | {
+            (model, row_key)
+            for model, increments in self._counters.items()
+            for row_key in increments
+        }
+        self._attempts = {
+            key: attempts for key, attempts in self._attempts.items()
+            if key in queued
+        }
+
+    async def _write_counters(self, session, model, increments) -> None:
+        column = self._counter_columns[model]
+        table = model.__table__
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={column: table.c[column] + stmt.excluded[column]}
+        )
+        await session.execute(stmt, [
+            {**dict(row_key), column: amount}
+            for row_key, amount in increments.items()
+        ])
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._full.wait(),
+                    timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and write the remaining rows"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            'pending': self.pending_count,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'rows_dropped': self.rows_dropped,
+        }
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from functools import partial
+
+from config import (
+    ANALYSIS_WORKERS,
+    ANALYSIS_QUEUE_SIZE,
+    ANALYSIS_JOB_TIMEOUT_SECONDS
+)
+from services.analysis_service import process_analysis_with_rating
+from services.metrics import LatencyStats
+
+
+@dataclass
+class _AnalysisJob:
+    user_id: int
+    chat_id: int
+    user_text: str | None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class AnalysisQueue:
+    """
+    Фоновая очередь анализов журнала.
+
+    Обработчик апдейта только ставит задачу и сразу завершается,
+    результат приходит через bot.send_message. Одновременно идет не
+    больше `workers` анализов, каждый ограничен `timeout` секундами.
+    На пользователя - не больше одной задачи в очереди: она все равно
+    прочитает свежие записи, поэтому повторные постановки
+    отбрасываются. Анализы одного пользователя идут по очереди.
+    """
+
+    def __init__(
+        self,
+        bot,
+        session_maker,
+        workers: int = ANALYSIS_WORKERS,
+        max_queue: int = ANALYSIS_QUEUE_SIZE,
+        timeout: float = ANALYSIS_JOB_TIMEOUT_SECONDS
+    ):
+        self.bot = bot
+        self.session_maker = session_maker
+        self.workers = workers
+        self.timeout = timeout
+        self._queue: asyncio.Queue[_AnalysisJob] = asyncio.Queue(max_queue)
+        self._queued_users: set[int] = set()
+        # user_id -> (lock, сколько воркеров держат или ждут lock)
+        self._user_locks: dict[int, list] = {}
+        self._workers: list[asyncio.Task] = []
+
+        self.completed = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queue_latency = LatencyStats()
+        self.run_latency = LatencyStats()
+
+    def start(self) -> None:
+        """Запускает воркеры анализа"""
+        for _ in range(self.workers):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        """Останавливает воркеры, задачи в очереди теряются"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def submit(
+        self,
+        user_id: int,
+        chat_id: int,
+        user_text: str | None = None
+    ) -> bool:
+        """Ставит анализ в очередь. False, если задача не поставлена"""
+        if user_id in self._queued_users:
+            self.deduplicated += 1
+            return False
+        try:
+            self._queue.put_nowait(_AnalysisJob(user_id, chat_id, user_text))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            print(f"Очередь анализов переполнена, пропуск для {user_id}")
+            return False
+        self._queued_users.add(user_id)
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            entry = self._user_locks.setdefault(
+                job.user_id, [asyncio.Lock(), 0]
+            )
+            entry[1] += 1
+            try:
+                async with entry[0]:
+                    # Задачу взяли в работу: записи, сделанные после
+                    # этого момента, попадут уже в следующий анализ
+                    self._queued_users.discard(job.user_id)
+                    await self._run(job)
+            finally:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._user_locks[job.user_id]
+                self._queue.task_done()
+
+    async def _run(self, job: _AnalysisJob) -> None:
+        started_at = time.monotonic()
+        self.queue_latency.observe(started_at - job.enqueued_at)
+        try:
+            await asyncio.wait_for(
+                process_analysis_with_rating(
+                    self.session_maker,
+                    job.user_id,
+                    partial(self.bot.send_message, job.chat_id),
+                    job.user_text
+                ),
+                timeout=self.timeout
+            )
+            self.completed += 1
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            print(f"Анализ для {job.user_id} прерван по таймауту")
+        except Exception as e:
+            print(f"Ошибка фонового анализа для {job.user_id}: {e}")
+        finally:
+            self.run_latency.observe(time.monotonic() - started_at)
+
+    def stats(self) -> dict:
+        """Счетчики очереди анализов"""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'completed': self.completed,
+            'deduplicated': self.deduplicated,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'queue_latency': self.queue_latency.as_dict(),
+            'run_latency': self.run_latency.as_dict(),
+        }
@@ -1,61 +1,188 @@
+import asyncio
 from datetime import datetime, timedelta
-from repositories import AnalysisRepository, JournalRepository
+from aiogram.exceptions import TelegramBadRequest
+from repositories import (
+    AnalysisRepository,
+    JournalRepository,
+    commit_unit_of_work,
+    format_rollup_key
+)
 from services.journal_analysis_service import analyze_with_mistral
+from services.mistral_client import mistral_available
+from services.streaming_reply import StreamingReply
+from services.analysis_trigger import (
+    ANALYSIS_WINDOW_DAYS,
+    evaluate_analysis_trigger,
+    record_analysis
+)
+from services.trigger_patterns import (
+    DAY_PERIODS,
+    find_trigger_patterns,
+    format_trigger_patterns
+)
 
+ANALYSIS_TIMED_OUT_TEXT = (
+    "⏱ Подробный разбор не успел подготовиться. "
+    "Быстрый анализ - в сообщении выше."
+)
 
-async def should_analyze_entries(session_maker, user_id: int) -> bool:
+# Сколько самых частых значений каждого измерения попадает в промпт
+SUMMARY_TOP_K = 5
+SUMMARY_DIMENSIONS = [
+    ('emotion', 'Эмоции'),
+    ('location', 'Места'),
+    ('company', 'Компания'),
+    ('emotion+location', 'Эмоция + место'),
+    ('emotion+company', 'Эмоция + компания'),
+    ('emotion+location+company', 'Частые сочетания'),
+]
+
+
+def format_rollup_summary(rollups) -> str:
     """
-    Проверяет, нужно ли запускать анализ записей пользователя.
-    
-    Анализ запускается если:
-    - Нет предыдущих анализов И есть >= 3 записей за неделю
-    - Последний анализ был > 3 дней назад И есть >= 3 новых записей
+    Сжатая сводка записей по счетчикам: топ значений каждого
+    измерения и распределение по времени суток. Размер не зависит
+    от числа записей.
     """
-    analysis_repo = AnalysisRepository(session_maker)
-    last_analysis = await analysis_repo.get_latest_analysis(user_id)
+    by_dimension = {}
+    for dimension, key, count in rollups:
+        by_dimension.setdefault(dimension, []).append((key, count))
+
+    hours = {int(key): count for key, count in by_dimension.get('hour', [])}
+    lines = [f"Всего записей: {sum(hours.values())}"]
+    for dimension, title in SUMMARY_DIMENSIONS:
+        top = by_dimension.get(dimension, [])[:SUMMARY_TOP_K]
+        if top:
+            lines.append(f"{title}: " + ", ".join(
+                f"{format_rollup_key(dimension, key)} ×{count}"
+                for key, count in top
+            ))
+    lines.append("Время суток: " + ", ".join(
+        f"{name} ×{sum(hours.get(h, 0) for h in range(first, last + 1))}"
+        for name, first, last in DAY_PERIODS
+    ))
+    return "\n".join(lines)
+
 
-    if not last_analysis:
-        # Если анализов нет, проверяем количество записей
+async def analyze_user_entries(
+    session_maker,
+    user_id: int,
+    rollups=None,
+    patterns_text: str = None,
+    on_text=None
+) -> str | None:
+    """
+    Анализирует записи пользователя за последнюю неделю
+    (или переданные счетчики rollups) с помощью LLM.
+    patterns_text - результат локального анализа, идет в промпт,
+    on_text - для потокового ответа.
+    Возвращает результат анализа или None, если LLM недоступна.
+    """
+    if rollups is None:
         journal_repo = JournalRepository(session_maker)
-        entries_week = await journal_repo.get_entries_since(
+        rollups = await journal_repo.get_rollups(
             user_id,
-            datetime.now() - timedelta(days=7)
+            (datetime.now() - timedelta(days=ANALYSIS_WINDOW_DAYS)).date()
         )
-        return len(entries_week) >= 3
 
-    # Если анализ был, проверяем прошло ли 3 дня
-    # if datetime.now() - last_analysis.created_at > timedelta(days=3):
-    #     # И есть ли новые записи
-    #     entries_since_last = await get_entries_since(
-    #         session_maker,
-    #         user_id,
-    #         last_analysis.created_at
-    #     )
-    #     return len(entries_since_last) >= 3
+    summary = format_rollup_summary(rollups)
+    if patterns_text:
+        summary += "\n\n" + patterns_text
 
-    return True
+    # Не держим соединение с БД, пока ждем ответ модели
+    await commit_unit_of_work()
+    return await analyze_with_mistral(summary, on_text)
 
 
-async def analyze_user_entries(session_maker, user_id: int) -> str:
+async def run_analysis(
+    session_maker,
+    user_id: int,
+    decision,
+    send_message_func
+):
     """
-    Анализирует записи пользователя за последнюю неделю.
-    Возвращает результат анализа.
+    Сначала локальный анализ: он считается за миллисекунды и сразу
+    отправляется пользователю. Затем разбор LLM, которому локальные
+    выводы идут в промпт; он появляется по мере генерации в
+    отдельном сообщении. Если Mistral недоступен, результатом
+    остается локальный анализ.
+
+    Возвращает (текст анализа, parse_mode, StreamingReply или None).
     """
-    journal_repo = JournalRepository(session_maker)
-    recent_entries = await journal_repo.get_entries_since(
-        user_id,
-        datetime.now() - timedelta(days=7)
+    patterns = await find_trigger_patterns(session_maker, user_id)
+    patterns_text = format_trigger_patterns(patterns)
+    if not mistral_available():
+        return patterns_text, None, None
+
+    await send_message_func(patterns_text)
+    reply = StreamingReply(
+        await send_message_func("🤖 Готовлю подробный разбор...")
     )
+    try:
+        analysis_result = await analyze_user_entries(
+            session_maker,
+            user_id,
+            decision.rollups,
+            patterns_text,
+            on_text=reply.update
+        )
+    except asyncio.CancelledError:
+        # Очередь прервала анализ по таймауту - не оставляем
+        # недописанный текст с курсором без объяснения
+        try:
+            await reply.finish(ANALYSIS_TIMED_OUT_TEXT)
+        except Exception as e:
+            print(f"Ошибка завершения прерванного анализа: {e}")
+        raise
+    if analysis_result is None:
+        return patterns_text, None, reply
+    return analysis_result, "Markdown", reply
+
+
+async def send_formatted(
+    send_message_func,
+    text: str,
+    parse_mode: str | None,
+    reply_markup=None
+):
+    """
+    Отправляет текст с разметкой, а если Telegram ее не принял
+    (например, "_" или "*" в тексте пользователя) - как есть
+    """
+    try:
+        return await send_message_func(
+            text,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup
+        )
+    except TelegramBadRequest as e:
+        if parse_mode is None:
+            raise
+        print(f"Разметка анализа не принята, отправляем без нее: {e}")
+        return await send_message_func(text, reply_markup=reply_markup)
 
-    entries_text = "\n".join([
-        f"- {e.created_at.strftime('%d.%m %H:%M')}: "
-        f"Эмоция '{e.emotion}', "
-        f"Место '{e.location}', "
-        f"С кем '{e.company}'"
-        for e in recent_entries
-    ])
 
-    return await analyze_with_mistral(entries_text)
+async def deliver_analysis(
+    send_message_func,
+    reply,
+    text: str,
+    parse_mode: str | None,
+    reply_markup=None
+):
+    """Итоговый анализ: правка потокового сообщения или новое"""
+    if reply is not None:
+        await reply.finish(
+            text,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup
+        )
+    else:
+        await send_formatted(
+            send_message_func,
+            text,
+            parse_mode,
+            reply_markup=reply_markup
+        )
 
 
 async def process_analysis_if_needed(
@@ -68,23 +195,24 @@ async def process_analysis_if_needed(
     Отправляет результаты пользователю.
     """
     try:
-        if await should_analyze_entries(session_maker, user_id):
-            await send_message_func(
-                "🤖 Собираю данные для анализа твоих паттернов... "
-                "Это займет пару секунд."
-            )
-
-            analysis_result = await analyze_user_entries(
+        decision = await evaluate_analysis_trigger(session_maker, user_id)
+        if decision.run:
+            analysis_result, parse_mode, reply = await run_analysis(
                 session_maker,
-                user_id
+                user_id,
+                decision,
+                send_message_func
             )
 
             # Сохраняем и отправляем
             analysis_repo = AnalysisRepository(session_maker)
             await analysis_repo.add_analysis(user_id, analysis_result)
-            await send_message_func(
+            await record_analysis(session_maker, user_id, decision)
+            await deliver_analysis(
+                send_message_func,
+                reply,
                 analysis_result,
-                parse_mode="Markdown"
+                parse_mode
             )
     except Exception as e:
         print(f"Ошибка при запуске анализа: {e}")
@@ -93,7 +221,7 @@ async def process_analysis_if_needed(
 async def process_analysis_with_rating(
     session_maker,
     user_id: int,
-    message,
+    send_message_func,
     user_text: str = None
 ):
     """
@@ -103,24 +231,33 @@ async def process_analysis_with_rating(
     Args:
         session_maker: Фабрика сессий БД
         user_id: ID пользователя
-        message: Объект сообщения для отправки ответа
+        send_message_func: Функция отправки сообщения пользователю
         user_text: Текст пользователя для сохранения (опционально)
     """
     try:
-        if await should_analyze_entries(session_maker, user_id):
-            await message.answer(
-                "🤖 Собираю данные для анализа твоих паттернов... "
-                "Это займет пару секунд."
+        decision = await evaluate_analysis_trigger(session_maker, user_id)
+        if decision.cached_text:
+            # Новых закономерностей нет - не вызываем LLM повторно
+            # Сохраненный анализ может быть локальным, без разметки
+            await send_formatted(
+                send_message_func,
+                "📌 Новых закономерностей пока нет. "
+                "Твой последний анализ:\n\n" + decision.cached_text,
+                "Markdown"
             )
-
-            analysis_result = await analyze_user_entries(
+            return
+        if decision.run:
+            analysis_result, parse_mode, reply = await run_analysis(
                 session_maker,
-                user_id
+                user_id,
+                decision,
+                send_message_func
             )
 
             # Сохраняем в таблицу анализов
             analysis_repo = AnalysisRepository(session_maker)
             await analysis_repo.add_analysis(user_id, analysis_result)
+            await record_analysis(session_maker, user_id, decision)
 
             # Формируем текст пользователя, если не передан
             if user_text is None:
@@ -137,10 +274,12 @@ async def process_analysis_with_rating(
                 analysis_result
             )
 
-            # Отправляем результат с кнопками оценки
-            await message.answer(
+            # Показываем результат с кнопками оценки
+            await deliver_analysis(
+                send_message_func,
+                reply,
                 analysis_result,
-                parse_mode="Markdown",
+                parse_mode,
                 reply_markup=kb_rating
             )
     except Exception as e:
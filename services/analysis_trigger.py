@@ -0,0 +1,111 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from hashlib import sha256
+
+from config import (
+    ANALYSIS_MIN_ENTRIES,
+    ANALYSIS_MIN_NEW_ENTRIES,
+    ANALYSIS_COOLDOWN_HOURS,
+    ANALYSIS_MAX_AGE_DAYS
+)
+from repositories import AnalysisRepository, JournalRepository
+
+ANALYSIS_WINDOW_DAYS = 7
+
+
+@dataclass
+class AnalysisDecision:
+    """
+    Решение триггера анализа.
+    run - нужен новый анализ LLM, cached_text - последний сохраненный
+    анализ, если новый не нужен.
+    """
+    run: bool
+    rollups: list = field(default_factory=list)
+    last_entry_id: int | None = None
+    fingerprint: str | None = None
+    cached_text: str | None = None
+
+
+def rollups_fingerprint(rollups) -> str:
+    """
+    Отпечаток набора триггеров: множество сочетаний
+    эмоция/место/компания. Повтор уже известных сочетаний
+    его не меняет.
+    """
+    combinations = sorted(
+        key for dimension, key, _ in rollups
+        if dimension == 'emotion+location+company'
+    )
+    return sha256("\n".join(combinations).encode('utf-8')).hexdigest()
+
+
+async def evaluate_analysis_trigger(
+    session_maker,
+    user_id: int
+) -> AnalysisDecision:
+    """
+    Решает, нужен ли новый анализ записей пользователя.
+
+    Первый анализ - при ANALYSIS_MIN_ENTRIES записях за неделю.
+    Повторный - если с прошлого анализа есть ANALYSIS_MIN_NEW_ENTRIES
+    новых записей, прошел ANALYSIS_COOLDOWN_HOURS и появились новые
+    сочетания триггеров (или анализ старше ANALYSIS_MAX_AGE_DAYS).
+    Иначе возвращается последний сохраненный анализ.
+    """
+    now = datetime.now()
+    since = now - timedelta(days=ANALYSIS_WINDOW_DAYS)
+    journal_repo = JournalRepository(session_maker)
+    analysis_repo = AnalysisRepository(session_maker)
+    state = await analysis_repo.get_state(user_id)
+    first_analysis = state is None or state.analyzed_at is None
+
+    total, new_entries, last_entry_id = await journal_repo.get_entries_stats(
+        user_id,
+        since,
+        None if first_analysis else state.last_entry_id
+    )
+    if first_analysis:
+        run = total >= ANALYSIS_MIN_ENTRIES
+    else:
+        analysis_age = now - state.analyzed_at
+        run = (
+            new_entries >= ANALYSIS_MIN_NEW_ENTRIES
+            and analysis_age >= timedelta(hours=ANALYSIS_COOLDOWN_HOURS)
+        )
+
+    if run:
+        # Счетчики читаем, только когда дешевые проверки пройдены
+        rollups = await journal_repo.get_rollups(user_id, since.date())
+        fingerprint = rollups_fingerprint(rollups)
+        if (
+            first_analysis
+            or fingerprint != state.fingerprint
+            or analysis_age >= timedelta(days=ANALYSIS_MAX_AGE_DAYS)
+        ):
+            return AnalysisDecision(
+                run=True,
+                rollups=rollups,
+                last_entry_id=last_entry_id,
+                fingerprint=fingerprint
+            )
+    if first_analysis:
+        return AnalysisDecision(run=False)
+    return AnalysisDecision(
+        run=False,
+        cached_text=await analysis_repo.get_latest_analysis_text(user_id)
+    )
+
+
+async def record_analysis(
+    session_maker,
+    user_id: int,
+    decision: AnalysisDecision
+) -> None:
+    """Запоминает, по каким записям сделан анализ"""
+    await AnalysisRepository(session_maker).save_state(
+        user_id,
+        decision.last_entry_id,
+        decision.fingerprint,
+        datetime.now()
+    )
@@ -0,0 +1,223 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from config import (
+    BROADCAST_RATE_LIMIT,
+    BROADCAST_CONCURRENCY,
+    BROADCAST_SPREAD_SECONDS
+)
+from services.metrics import LatencyStats
+
+# Минимальный интервал между сообщениями в один чат (сек)
+PER_CHAT_INTERVAL = 1.0
+MAX_RETRIES = 3
+# Сколько ждать отправки очереди при остановке бота (сек)
+DRAIN_TIMEOUT = 10.0
+
+
+class TokenBucket:
+    """Глобальный лимит скорости отправки (сообщений в секунду)"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Останавливает выдачу токенов (например, после flood wait)"""
+        self._paused_until = max(
+            self._paused_until,
+            time.monotonic() + seconds
+        )
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class _Job:
+    chat_id: int
+    send_func: Callable[..., Awaitable[Any]]
+    args: tuple
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class BroadcastDispatcher:
+    """
+    Рассылка сообщений с учетом лимитов Telegram.
+
+    Ограничивает общую скорость (token bucket), частоту сообщений в
+    один чат и число одновременных отправок, повторяет отправку после
+    TelegramRetryAfter и размазывает массовые рассылки по времени.
+    """
+
+    def __init__(
+        self,
+        rate: float = BROADCAST_RATE_LIMIT,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        spread_seconds: float = BROADCAST_SPREAD_SECONDS
+    ):
+        self.concurrency = concurrency
+        self.spread_seconds = spread_seconds
+        self._bucket = TokenBucket(rate)
+        self._queue: asyncio.Queue[_Job] = asyncio.Queue()
+        # chat_id -> ближайшее время, когда в чат можно писать снова
+        self._chat_next_slot: dict[int, float] = {}
+        self._workers: list[asyncio.Task] = []
+        # id(job) -> (таймер постановки в очередь, job)
+        self._delayed: dict[int, tuple[asyncio.TimerHandle, _Job]] = {}
+        self._draining = False
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.queue_latency = LatencyStats()
+        self.send_latency = LatencyStats()
+
+    @property
+    def queue_depth(self) -> int:
+        """Сообщения в очереди и ожидающие своего времени отправки"""
+        return self._queue.qsize() + len(self._delayed)
+
+    def start(self) -> None:
+        """Запускает воркеры отправки"""
+        for _ in range(self.concurrency):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT) -> None:
+        """
+        Отправляет очередь без ожидания случайных задержек и
+        останавливает воркеры. Что не успело уйти за `timeout`,
+        теряется (напоминания повторит следующий запуск по аренде).
+        """
+        self._draining = True
+        for handle, job in list(self._delayed.values()):
+            handle.cancel()
+            self._queue.put_nowait(job)
+        self._delayed.clear()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(
+                f"Рассылка остановлена, не отправлено: {self.queue_depth}"
+            )
+        await self.stop()
+
+    async def stop(self) -> None:
+        """Останавливает воркеры, неотправленные сообщения теряются"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def submit(self, chat_id: int, send_func, *args) -> None:
+        """
+        Ставит отправку в очередь со случайной задержкой
+        в пределах spread_seconds.
+        """
+        job = _Job(chat_id, send_func, args)
+        delay = random.uniform(0, self.spread_seconds)
+        self._put_later(job, delay)
+
+    def _put_later(self, job: _Job, delay: float) -> None:
+        if delay <= 0 or self._draining:
+            self._queue.put_nowait(job)
+            return
+
+        def put():
+            del self._delayed[id(job)]
+            self._queue.put_nowait(job)
+
+        self._delayed[id(job)] = (
+            asyncio.get_running_loop().call_later(delay, put),
+            job
+        )
+
+    def _reserve_chat_slot(self, chat_id: int) -> float:
+        """
+        Занимает ближайшее свободное время отправки в чат и возвращает,
+        сколько до него ждать. Между чтением и записью нет await,
+        поэтому два воркера не получат одно и то же время.
+        """
+        now = time.monotonic()
+        slot = max(now, self._chat_next_slot.get(chat_id, now))
+        self._chat_next_slot[chat_id] = slot + PER_CHAT_INTERVAL
+
+        if len(self._chat_next_slot) > 10000:
+            self._chat_next_slot = {
+                chat: next_slot
+                for chat, next_slot in self._chat_next_slot.items()
+                if next_slot > now
+            }
+        return slot - now
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._send(job)
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, job: _Job) -> None:
+        # Сначала ждем очереди чата, и только потом берем общий токен,
+        # чтобы ожидание одного чата не занимало общую пропускную
+        # способность
+        delay = self._reserve_chat_slot(job.chat_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._bucket.acquire()
+
+        started_at = time.monotonic()
+        self.queue_latency.observe(started_at - job.enqueued_at)
+        try:
+            await job.send_func(*job.args)
+            self.sent += 1
+        except TelegramRetryAfter as e:
+            job.attempts += 1
+            if job.attempts > MAX_RETRIES:
+                self.failed += 1
+                print(f"Превышено число повторов для чата {job.chat_id}")
+                return
+            self.retried += 1
+            self._bucket.pause(e.retry_after)
+            self._put_later(job, e.retry_after)
+        except Exception as e:
+            self.failed += 1
+            print(f"Ошибка рассылки в чат {job.chat_id}: {e}")
+        finally:
+            self.send_latency.observe(time.monotonic() - started_at)
+
+    def stats(self) -> dict:
+        """Счетчики рассылки"""
+        return {
+            'queue_depth': self.queue_depth,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'queue_latency': self.queue_latency.as_dict(),
+            'send_latency': self.send_latency.as_dict(),
+        }
@@ -0,0 +1,80 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+
+from config import EXPORT_CONCURRENCY, EXPORT_COOLDOWN_SECONDS
+from repositories import ExportRepository, EXPORT_MODELS
+
+# Выгрузки читают БД отдельными соединениями, поэтому их число
+# ограничено, чтобы не занимать пул интерактивных запросов
+_export_semaphore = asyncio.Semaphore(EXPORT_CONCURRENCY)
+_last_export_at: dict[int, float] = {}
+
+
+async def write_jsonl_gz(path: str, batches) -> int:
+    """
+    Пишет пачки словарей в gzip JSONL по мере поступления.
+    Файл появляется под итоговым именем только после полной записи.
+    Возвращает число записанных строк.
+    """
+    tmp_path = f"{path}.tmp"
+    count = 0
+    archive = await asyncio.to_thread(
+        gzip.open, tmp_path, 'wt', encoding='utf-8'
+    )
+    try:
+        async for rows in batches:
+            lines = ''.join(
+                json.dumps(row, ensure_ascii=False, default=str) + '\n'
+                for row in rows
+            )
+            await asyncio.to_thread(archive.write, lines)
+            count += len(rows)
+    finally:
+        await asyncio.to_thread(archive.close)
+    os.replace(tmp_path, path)
+    return count
+
+
+def export_retry_after(user_id: int) -> int:
+    """Сколько секунд пользователь должен подождать до новой выгрузки"""
+    last_export_at = _last_export_at.get(user_id)
+    if last_export_at is None:
+        return 0
+    return max(
+        0,
+        int(last_export_at + EXPORT_COOLDOWN_SECONDS - time.monotonic())
+    )
+
+
+def mark_export_started(user_id: int) -> None:
+    """
+    Отмечает выгрузку до ее начала, чтобы повторная команда, пришедшая
+    пока выгрузка ждет семафор, уже попала под ограничение
+    """
+    _last_export_at[user_id] = time.monotonic()
+
+
+def clear_export(user_id: int) -> None:
+    """Снимает ограничение после неудачной выгрузки"""
+    _last_export_at.pop(user_id, None)
+
+
+async def export_user_data(session_maker, user_id: int, path: str) -> int:
+    """
+    Выгружает журнал, цели, анализы и ответы AI пользователя в
+    gzip JSONL (поле table - имя таблицы). Возвращает число строк.
+    """
+    export_repo = ExportRepository(session_maker)
+
+    async def batches():
+        for model in EXPORT_MODELS:
+            async for rows in export_repo.stream_user_rows(model, user_id):
+                for row in rows:
+                    row['table'] = model.__tablename__
+                yield rows
+
+    async with _export_semaphore:
+        return await write_jsonl_gz(path, batches())
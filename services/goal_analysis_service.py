@@ -1,9 +1,30 @@
 import json
 import re
-from services.mistral_client import get_mistral_client
 
+from config import (
+    LLM_CACHE_TTL_CLARIFYING_HOURS,
+    LLM_CACHE_TTL_GOALS_ANALYSIS_HOURS
+)
+from repositories import commit_unit_of_work
+from services.mistral_client import get_mistral_client, complete_chat
+from services.llm_cache import get_llm_cache, llm_cache_key, normalize_input
 
-async def generate_clarifying_question(goal_text):
+# Версии промптов для ключей кэша: меняются вместе с текстом промпта
+CLARIFYING_PROMPT_VERSION = 2
+GOALS_ANALYSIS_PROMPT_VERSION = 1
+
+
+# Номер пункта (1. или 1)) или маркер (-, •, *, →) в начале строки.
+# Число без точки или скобки - часть цели ("10 отжиманий")
+LIST_MARKER_RE = re.compile(r'^\s*(?:\d+[.)]\s+|[-•*→]\s*)')
+
+
+def strip_list_marker(goal: str) -> str:
+    """Убирает номер пункта и маркер списка в начале цели"""
+    return LIST_MARKER_RE.sub('', goal, count=1).strip()
+
+
+async def generate_clarifying_question(goal_text, on_text=None):
     client = get_mistral_client()
     if not client:
         return (
@@ -11,6 +32,21 @@ async def generate_clarifying_question(goal_text):
             "решение должно быть готово к концу этих 2 часов?"
         )
 
+    # Частые цели ("написать отчет") повторяются у разных пользователей
+    cache = get_llm_cache()
+    cache_key = llm_cache_key(
+        'clarifying_question',
+        "mistral-tiny",
+        CLARIFYING_PROMPT_VERSION,
+        normalize_input(goal_text)
+    )
+    cached = await cache.get('clarifying_question', cache_key)
+    if cached is not None:
+        return cached
+    # Чтение кэша открыло транзакцию апдейта - не держим соединение
+    # с БД, пока ждем ответ модели
+    await commit_unit_of_work()
+
     prompt = f"""
     Пользователь поставил себе цель на завтра: "{goal_text}".
 
@@ -29,16 +65,17 @@ async def generate_clarifying_question(goal_text):
     """
 
     try:
-        chat_response = await client.chat.complete_async(
-            model="mistral-tiny",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ]
+        question = await complete_chat(
+            client, "mistral-tiny", prompt, on_text
         )
-        return chat_response.choices[0].message.content
+        await cache.put(
+            'clarifying_question',
+            cache_key,
+            question,
+            LLM_CACHE_TTL_CLARIFYING_HOURS
+        )
+        await commit_unit_of_work()
+        return question
     except Exception as e:
         print(f"Mistral error: {e}")
         return (
@@ -47,7 +84,9 @@ async def generate_clarifying_question(goal_text):
         )
 
 
-async def brainstorm_goal_failure(goal_text, result_text, reason):
+async def brainstorm_goal_failure(
+    goal_text, result_text, reason, on_text=None
+):
     client = get_mistral_client()
     if not client:
         return "Ничего страшного. Завтра будет новый шанс!"
@@ -76,16 +115,7 @@ async def brainstorm_goal_failure(goal_text, result_text, reason):
     """
 
     try:
-        chat_response = await client.chat.complete_async(
-            model="mistral-medium",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ]
-        )
-        return chat_response.choices[0].message.content
+        return await complete_chat(client, "mistral-medium", prompt, on_text)
     except Exception as e:
         print(f"Mistral brainstorm error: {e}")
         return (
@@ -149,6 +179,21 @@ async def analyze_goals_list(goals_list):
             'top_goal': {'goal': '', 'reason': 'Список целей пуст.'},
             'smart_analysis': []
         }
+
+    cache = get_llm_cache()
+    cache_key = llm_cache_key(
+        'goals_analysis',
+        "mistral-medium",
+        GOALS_ANALYSIS_PROMPT_VERSION,
+        "\n".join(
+            normalize_input(strip_list_marker(goal))
+            for goal in goals_text_list
+        )
+    )
+    cached = await cache.get('goals_analysis', cache_key)
+    if cached is not None:
+        return json.loads(cached)
+    await commit_unit_of_work()
     
     goals_formatted = "\n".join([
         f"{i+1}. {goal}" for i, goal in enumerate(goals_text_list)
@@ -247,7 +292,15 @@ async def analyze_goals_list(goals_list):
                 }
             if 'smart_analysis' not in result:
                 result['smart_analysis'] = []
-            
+
+            # Кэшируем только успешно разобранные ответы
+            await cache.put(
+                'goals_analysis',
+                cache_key,
+                json.dumps(result, ensure_ascii=False),
+                LLM_CACHE_TTL_GOALS_ANALYSIS_HOURS
+            )
+            await commit_unit_of_work()
             return result
         except json.JSONDecodeError as e:
             print(f"Ошибка парсинга JSON от Mistral: {e}")
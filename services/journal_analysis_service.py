@@ -1,17 +1,24 @@
-from services.mistral_client import get_mistral_client
+from services.mistral_client import get_mistral_client, complete_chat
 
 
-async def analyze_with_mistral(entries_text):
+async def analyze_with_mistral(entries_text, on_text=None):
+    """
+    Разбор сводки записей. None, если Mistral недоступен.
+    on_text - для потокового ответа, см. complete_chat.
+    """
     client = get_mistral_client()
     if not client:
-        return "Ошибка: MISTRAL_API_KEY не найден."
+        return None
 
     prompt = f"""
     Ты - эмпатичный психолог-аналитик, работающий в подходе КПТ.
-    Проанализируй следующие записи о срывах пользователя:
+    Проанализируй сводку записей о срывах пользователя за неделю
+    (×N - сколько раз встречалось):
 
     {entries_text}
 
+    Пользователь уже видел быстрый анализ из сводки: не пересказывай
+    цифры, а объясни, что за ними стоит.
     Дай краткую сводку, выдели основные паттерны (триггеры, места,
     эмоции) и дай 1-2 конкретных, мягких рекомендации.
     Не используй сложные термины, пиши дружелюбно.
@@ -25,15 +32,9 @@ async def analyze_with_mistral(entries_text):
     """
 
     try:
-        chat_response = await client.chat.complete_async(
-            model="mistral-tiny",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ]
+        return await complete_chat(
+            client, "mistral-tiny", prompt, on_text
         )
-        return chat_response.choices[0].message.content
     except Exception as e:
-        return f"Ошибка при анализе: {e}"
+        print(f"Mistral error: {e}")
+        return None
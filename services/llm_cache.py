@@ -0,0 +1,135 @@
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from hashlib import sha256
+
+from config import LLM_CACHE_MAX_ENTRIES
+from repositories import LLMCacheRepository
+
+
+def normalize_input(text: str) -> str:
+    """Вход без различий в регистре и пробелах"""
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+def llm_cache_key(
+    feature: str,
+    model: str,
+    prompt_version: int,
+    normalized_input: str
+) -> str:
+    """
+    Ключ кэша. Версию промпта нужно менять вместе с текстом промпта,
+    тогда старые ответы перестают находиться.
+    """
+    raw = f"{feature}\n{model}\n{prompt_version}\n{normalized_input}"
+    return sha256(raw.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Двухуровневый кэш ответов LLM: LRU в памяти процесса и таблица
+    llm_cache в Postgres, общая для перезапусков и инстансов бота.
+    Ответ из памяти возвращается без обращения к БД и к модели.
+    """
+
+    def __init__(
+        self,
+        session_maker=None,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES
+    ):
+        self.session_maker = session_maker
+        self.max_entries = max_entries
+        # key -> (expires_at, response), порядок - от давно прочитанных
+        self._entries: OrderedDict[str, tuple[datetime, str]] = OrderedDict()
+        # feature -> счетчики попаданий и промахов
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, feature: str, counter: str) -> None:
+        stats = self._stats.setdefault(feature, {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'stored': 0,
+        })
+        stats[counter] += 1
+
+    def _remember(self, key: str, expires_at: datetime, response: str):
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, feature: str, key: str) -> str | None:
+        """Ответ из кэша или None"""
+        now = datetime.now()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self._count(feature, 'memory_hits')
+                return response
+            del self._entries[key]
+
+        if self.session_maker is not None:
+            try:
+                row = await LLMCacheRepository(
+                    self.session_maker
+                ).get_response(key, now)
+            except Exception as e:
+                print(f"Ошибка чтения кэша LLM: {e}")
+                row = None
+            if row is not None:
+                self._remember(key, row.expires_at, row.response)
+                self._count(feature, 'db_hits')
+                return row.response
+
+        self._count(feature, 'misses')
+        return None
+
+    async def put(
+        self,
+        feature: str,
+        key: str,
+        response: str,
+        ttl_hours: float
+    ) -> None:
+        """Сохраняет ответ в оба уровня"""
+        expires_at = datetime.now() + timedelta(hours=ttl_hours)
+        self._remember(key, expires_at, response)
+        self._count(feature, 'stored')
+        if self.session_maker is None:
+            return
+        try:
+            await LLMCacheRepository(self.session_maker).save_response(
+                key,
+                feature,
+                response,
+                expires_at
+            )
+        except Exception as e:
+            print(f"Ошибка записи кэша LLM: {e}")
+
+    def stats(self) -> dict:
+        """Счетчики попаданий по функциям и размер кэша в памяти"""
+        return {
+            'memory_entries': len(self._entries),
+            'features': {
+                feature: dict(stats)
+                for feature, stats in self._stats.items()
+            },
+        }
+
+
+_cache = LLMCache()
+
+
+def init_llm_cache(session_maker) -> LLMCache:
+    """Подключает к кэшу таблицу в БД (без нее кэш только в памяти)"""
+    _cache.session_maker = session_maker
+    return _cache
+
+
+def get_llm_cache() -> LLMCache:
+    return _cache
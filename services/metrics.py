@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class LatencyStats:
+    """Накопительная статистика длительностей (в секундах)"""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'avg': round(self.average, 3),
+            'max': round(self.max, 3),
+            'last': round(self.last, 3),
+        }
@@ -1,14 +1,89 @@
 import os
+
+import httpx
 from mistralai import Mistral
 from dotenv import load_dotenv
 
+from config import (
+    MISTRAL_TIMEOUT_SECONDS,
+    MISTRAL_CONNECT_TIMEOUT_SECONDS,
+    MISTRAL_MAX_CONNECTIONS,
+    MISTRAL_KEEPALIVE_SECONDS
+)
+
 load_dotenv()
 
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 
+# Один клиент на процесс: соединения с API переиспользуются,
+# и запросы не тратят время на TCP и TLS handshake
+_client: Mistral | None = None
+_http_client: httpx.AsyncClient | None = None
 
-def get_mistral_client():
+
+def mistral_available() -> bool:
+    return bool(MISTRAL_API_KEY)
+
+
+def init_mistral_client() -> Mistral | None:
+    """Создает общий клиент с пулом keep-alive соединений"""
+    global _client, _http_client
     if not MISTRAL_API_KEY:
         return None
-    return Mistral(api_key=MISTRAL_API_KEY)
+    if _client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MISTRAL_MAX_CONNECTIONS,
+                max_keepalive_connections=MISTRAL_MAX_CONNECTIONS,
+                keepalive_expiry=MISTRAL_KEEPALIVE_SECONDS
+            ),
+            timeout=httpx.Timeout(
+                MISTRAL_TIMEOUT_SECONDS,
+                connect=MISTRAL_CONNECT_TIMEOUT_SECONDS
+            )
+        )
+        _client = Mistral(
+            api_key=MISTRAL_API_KEY,
+            async_client=_http_client,
+            timeout_ms=int(MISTRAL_TIMEOUT_SECONDS * 1000)
+        )
+    return _client
+
+
+async def close_mistral_client() -> None:
+    """Закрывает соединения общего клиента при остановке бота"""
+    global _client, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _client = None
+    _http_client = None
+
+
+def get_mistral_client():
+    return init_mistral_client()
+
+
+async def complete_chat(client, model: str, prompt: str, on_text=None):
+    """
+    Ответ модели на промпт. С on_text ответ запрашивается потоком,
+    и после каждого фрагмента вызывается on_text(текст на данный момент).
+    """
+    messages = [{"role": "user", "content": prompt}]
+    if on_text is None:
+        chat_response = await client.chat.complete_async(
+            model=model,
+            messages=messages
+        )
+        return chat_response.choices[0].message.content
 
+    text = ""
+    async with await client.chat.stream_async(
+        model=model,
+        messages=messages
+    ) as stream:
+        async for event in stream:
+            delta = event.data.choices[0].delta.content
+            if isinstance(delta, str) and delta:
+                text += delta
+                await on_text(text)
+    return text
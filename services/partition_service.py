@@ -0,0 +1,96 @@
+import asyncio
+import os
+from datetime import date
+
+from config import (
+    PARTITION_MONTHS_AHEAD,
+    PARTITION_RETENTION_MONTHS,
+    PARTITION_ARCHIVE_DIR
+)
+from repositories import (
+    PartitionRepository,
+    PARTITIONED_TABLES,
+    TextBlobRepository
+)
+from services.export_service import write_jsonl_gz
+
+
+def add_months(month_start: date, months: int) -> date:
+    """Первое число месяца через `months` месяцев"""
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+async def ensure_partitions(session_maker, today: date) -> None:
+    """Создает партиции на текущий и несколько следующих месяцев"""
+    partition_repo = PartitionRepository(session_maker)
+    current_month = today.replace(day=1)
+    for table in PARTITIONED_TABLES:
+        for months in range(PARTITION_MONTHS_AHEAD + 1):
+            month_start = add_months(current_month, months)
+            await partition_repo.create_partition(
+                table,
+                month_start,
+                add_months(month_start, 1)
+            )
+
+
+async def archive_partition(
+    partition_repo: PartitionRepository,
+    table: str,
+    partition: str,
+    archive_dir: str
+) -> str:
+    """Выгружает строки партиции в {archive_dir}/{partition}.jsonl.gz"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{partition}.jsonl.gz")
+    await write_jsonl_gz(
+        path,
+        partition_repo.stream_rows(table, partition)
+    )
+    return path
+
+
+async def apply_retention(session_maker, today: date) -> None:
+    """
+    Архивирует и удаляет партиции старше PARTITION_RETENTION_MONTHS
+    месяцев. Партиция удаляется только после успешной выгрузки.
+    """
+    if PARTITION_RETENTION_MONTHS <= 0:
+        return
+    partition_repo = PartitionRepository(session_maker)
+    cutoff = add_months(today.replace(day=1), -PARTITION_RETENTION_MONTHS)
+    dropped = False
+    for table in PARTITIONED_TABLES:
+        for partition, month_start in await partition_repo.get_partitions(
+            table
+        ):
+            if month_start >= cutoff:
+                break
+            if PARTITION_ARCHIVE_DIR:
+                path = await archive_partition(
+                    partition_repo,
+                    table,
+                    partition,
+                    PARTITION_ARCHIVE_DIR
+                )
+                print(f"Партиция {partition} выгружена в {path}")
+            await partition_repo.drop_partition(table, partition)
+            print(f"Партиция {partition} удалена")
+            dropped = True
+
+    if dropped:
+        # Тексты ответов AI, на которые больше никто не ссылается
+        await TextBlobRepository(session_maker).delete_orphans()
+
+
+async def partition_maintenance_loop(session_maker):
+    """Раз в сутки создает будущие партиции и применяет политику хранения"""
+    while True:
+        try:
+            today = date.today()
+            await ensure_partitions(session_maker, today)
+            await apply_retention(session_maker, today)
+        except Exception as e:
+            print(f"Ошибка обслуживания партиций: {e}")
+        await asyncio.sleep(24 * 60 * 60)
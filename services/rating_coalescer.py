@@ -0,0 +1,64 @@
+import asyncio
+from contextvars import Context
+
+from config import RATING_FLUSH_SECONDS
+from repositories import AIRepository
+
+
+class RatingCoalescer:
+    """
+    Копит оценки ответов AI в коротком окне и записывает их пачкой.
+    Повторные нажатия по одному ответу схлопываются: сохраняется
+    последняя оценка.
+    """
+
+    def __init__(self, session_maker, window: float = RATING_FLUSH_SECONDS):
+        self.session_maker = session_maker
+        self.window = window
+        self._pending: dict[int, int] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_lock = asyncio.Lock()
+
+        self.submitted = 0
+        self.written = 0
+
+    def submit(self, response_id: int, rating: int) -> None:
+        """Запоминает оценку, запись в БД - по истечении окна"""
+        self._pending[response_id] = rating
+        self.submitted += 1
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_handle is not None:
+            return
+        # Пустой контекст: запись не должна попасть в сессию БД
+        # апдейта, из которого пришла оценка
+        self._flush_handle = asyncio.get_running_loop().call_later(
+            self.window,
+            lambda: asyncio.create_task(self.flush()),
+            context=Context()
+        )
+
+    async def flush(self) -> None:
+        """Записывает накопленные оценки одним UPDATE"""
+        async with self._flush_lock:
+            self._flush_handle = None
+            ratings, self._pending = self._pending, {}
+            if not ratings:
+                return
+            try:
+                await AIRepository(self.session_maker).update_ai_ratings(
+                    ratings
+                )
+                self.written += len(ratings)
+            except Exception as e:
+                print(f"Ошибка сохранения оценок: {e}")
+                # Более новые оценки, пришедшие во время записи, важнее
+                self._pending = {**ratings, **self._pending}
+                self._schedule_flush()
+
+    async def stop(self) -> None:
+        """Записывает оставшиеся оценки при остановке бота"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        await self.flush()
@@ -0,0 +1,243 @@
+import asyncio
+import heapq
+from time import monotonic
+from datetime import datetime, timedelta
+from aiogram import Bot
+
+from repositories import GoalRepository, UserRepository, ReminderRepository
+from services.broadcast import BroadcastDispatcher
+from config import REMINDER_MAX_LATENESS_SECONDS, REMINDER_MAX_ATTEMPTS
+from services.scheduler import (
+    DEFAULT_REMINDER_TIMES,
+    REMINDER_LAG,
+    ReminderStatsReporter,
+    get_reminder_times,
+    queue_reminders,
+    reminder_lease_until,
+    resend_expired_reminders
+)
+from services.timezone_service import get_user_timezone, local_to_utc, utc_now
+
+# Как часто проверять напоминания с истекшей арендой (сек)
+LEASE_CHECK_INTERVAL = 60
+# Пауза перед повтором после ошибки БД (сек)
+RETRY_DELAY = 5
+
+
+class ReminderTimer:
+    """
+    Событийный планировщик напоминаний.
+
+    Хранит кучу с абсолютным временем отправки (UTC) для каждой
+    пары (цель, тип напоминания). Заполняется при изменении целей
+    и часового пояса через слушателей репозиториев, между
+    срабатываниями спит без запросов к БД.
+
+    Слушатели видят только изменения своего процесса, поэтому режим
+    рассчитан на один экземпляр бота. Несколько экземпляров должны
+    работать в режиме poll.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_maker,
+        dispatcher: BroadcastDispatcher
+    ):
+        self.bot = bot
+        self.session_maker = session_maker
+        self.dispatcher = dispatcher
+        self._heap: list[tuple[datetime, int, str]] = []
+        # (goal_id, reminder_type) -> актуальное время отправки
+        self._fire_times: dict[tuple[int, str], datetime] = {}
+        self._goals = {}
+        self._user_goals: dict[int, set[int]] = {}
+        self._user_settings = {}
+        self._wakeup = asyncio.Event()
+        self._leases_checked_at = 0.0
+        self._stats = ReminderStatsReporter(dispatcher)
+
+    def _fire_times_for(self, goal) -> dict[str, datetime]:
+        """Время напоминаний о цели в UTC по типам"""
+        user_settings = self._user_settings.get(goal.user_id)
+        tz = get_user_timezone(user_settings)
+        return {
+            reminder_type: local_to_utc(
+                tz,
+                goal.target_date.date(),
+                reminder_time
+            )
+            for reminder_type, reminder_time
+            in get_reminder_times(user_settings).items()
+        }
+
+    def _schedule(self, goal) -> None:
+        """Добавляет напоминания о цели в очередь"""
+        # Недавно пропущенные напоминания (например, при перезапуске)
+        # все еще отправляются
+        min_fire_at = utc_now() - timedelta(
+            seconds=REMINDER_MAX_LATENESS_SECONDS
+        )
+        self._goals[goal.id] = goal
+        self._user_goals.setdefault(goal.user_id, set()).add(goal.id)
+
+        for reminder_type, fire_at in self._fire_times_for(goal).items():
+            if fire_at < min_fire_at:
+                self._fire_times.pop((goal.id, reminder_type), None)
+                continue
+            self._fire_times[(goal.id, reminder_type)] = fire_at
+            heapq.heappush(self._heap, (fire_at, goal.id, reminder_type))
+
+        self._wakeup.set()
+
+    def _cancel(self, goal_id: int) -> None:
+        """Убирает напоминания о цели (записи в куче устаревают)"""
+        goal = self._goals.pop(goal_id, None)
+        if goal is not None:
+            self._user_goals.get(goal.user_id, set()).discard(goal_id)
+        for reminder_type in DEFAULT_REMINDER_TIMES:
+            self._fire_times.pop((goal_id, reminder_type), None)
+
+    async def rebuild(self) -> None:
+        """Перестраивает очередь по активным целям из БД"""
+        since_date = utc_now().date() - timedelta(days=1)
+        goals = await GoalRepository(
+            self.session_maker
+        ).get_pending_goals(since_date)
+        settings = await UserRepository(
+            self.session_maker
+        ).get_settings_for_users(list({goal.user_id for goal in goals}))
+
+        self._heap.clear()
+        self._fire_times.clear()
+        self._goals.clear()
+        self._user_goals.clear()
+        self._user_settings = dict(settings)
+        for goal in goals:
+            self._user_settings.setdefault(goal.user_id, None)
+            self._schedule(goal)
+
+    async def on_goal_added(self, goal) -> None:
+        if goal.user_id not in self._user_settings:
+            self._user_settings[goal.user_id] = await UserRepository(
+                self.session_maker
+            ).get_user_settings(goal.user_id)
+        self._schedule(goal)
+
+    async def on_goal_deleted(self, goal_id: int) -> None:
+        self._cancel(goal_id)
+
+    async def on_goal_status_changed(
+        self, goal_id: int, is_completed: int
+    ) -> None:
+        if is_completed:
+            self._cancel(goal_id)
+
+    async def on_user_settings_changed(self, user_id: int) -> None:
+        self._user_settings.pop(user_id, None)
+        if not self._user_goals.get(user_id):
+            return
+        self._user_settings[user_id] = await UserRepository(
+            self.session_maker
+        ).get_user_settings(user_id)
+        for goal_id in list(self._user_goals.get(user_id, ())):
+            self._schedule(self._goals[goal_id])
+
+    async def _fire_due(self) -> None:
+        """Ставит в очередь рассылки напоминания, время которых наступило"""
+        now = utc_now()
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, goal_id, reminder_type = heapq.heappop(self._heap)
+            if self._fire_times.get((goal_id, reminder_type)) != fire_at:
+                continue
+            goal = self._goals[goal_id]
+            ledger_key = (
+                goal.user_id, reminder_type, goal.target_date.date()
+            )
+            due.setdefault(ledger_key, []).append((fire_at, goal))
+
+        reminder_repo = ReminderRepository(self.session_maker)
+        due_items = list(due.items())
+        for i, (ledger_key, entries) in enumerate(due_items):
+            user_id, reminder_type, local_date = ledger_key
+            try:
+                # Другой экземпляр бота мог уже отправить это напоминание
+                leased = await reminder_repo.lease_reminder(
+                    user_id,
+                    reminder_type,
+                    local_date,
+                    now,
+                    reminder_lease_until(now),
+                    REMINDER_MAX_ATTEMPTS
+                )
+            except Exception:
+                # Напоминания остаются в очереди до следующей попытки
+                for (_, pending_type, _), pending in due_items[i:]:
+                    for fire_at, goal in pending:
+                        heapq.heappush(
+                            self._heap, (fire_at, goal.id, pending_type)
+                        )
+                raise
+
+            # Пока шел запрос, цель могли выполнить или перенести
+            goals = []
+            for fire_at, goal in entries:
+                key = (goal.id, reminder_type)
+                if self._fire_times.get(key) == fire_at:
+                    del self._fire_times[key]
+                    goals.append(goal)
+                    REMINDER_LAG.observe((now - fire_at).total_seconds())
+            if leased and goals:
+                queue_reminders(
+                    self.bot,
+                    self.dispatcher,
+                    self.session_maker,
+                    [(goal, reminder_type, local_date) for goal in goals]
+                )
+            for goal in goals:
+                if not any(
+                    (goal.id, name) in self._fire_times
+                    for name in DEFAULT_REMINDER_TIMES
+                ):
+                    self._cancel(goal.id)
+
+    async def run(self) -> None:
+        """
+        Основной цикл: спит до ближайшего времени отправки, но не
+        дольше LEASE_CHECK_INTERVAL, чтобы повторять недоставленные
+        напоминания
+        """
+        while True:
+            try:
+                await self._fire_due()
+                if monotonic() - self._leases_checked_at >= (
+                    LEASE_CHECK_INTERVAL
+                ):
+                    self._leases_checked_at = monotonic()
+                    await resend_expired_reminders(
+                        self.bot,
+                        self.dispatcher,
+                        self.session_maker,
+                        utc_now()
+                    )
+                    self._stats.report()
+            except Exception as e:
+                print(f"Ошибка таймера напоминаний: {e}")
+                failed = True
+            else:
+                failed = False
+
+            timeout = LEASE_CHECK_INTERVAL
+            if self._heap:
+                delay = self._heap[0][0] - utc_now()
+                timeout = min(max(delay.total_seconds(), 0), timeout)
+            if failed:
+                # Не повторяем сразу, пока БД недоступна
+                timeout = max(timeout, RETRY_DELAY)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -1,10 +1,65 @@
 import asyncio
-from datetime import datetime
+from time import monotonic
+from datetime import datetime, time, timedelta
 from aiogram import Bot
 
-from repositories import GoalRepository, UserRepository
+from config import (
+    REMINDER_CLAIM_BATCH,
+    REMINDER_MAX_LATENESS_SECONDS,
+    REMINDER_LEASE_SECONDS,
+    REMINDER_MAX_ATTEMPTS
+)
+from repositories import (
+    UserRepository,
+    ReminderRepository,
+    GoalRepository,
+    LLMCacheRepository
+)
 from keyboards import get_goal_check_keyboard
-from services.timezone_service import is_time_for_reminder
+from services.broadcast import BroadcastDispatcher
+from services.llm_cache import get_llm_cache
+from services.metrics import LatencyStats
+from services.timezone_service import (
+    get_user_timezone,
+    local_to_utc,
+    utc_to_local,
+    utc_now
+)
+
+# Время напоминаний по умолчанию (по местному времени пользователя)
+DEFAULT_REMINDER_TIMES = {
+    'morning': time(9, 0),
+    'evening': time(21, 0),
+}
+SENT_REMINDERS_RETENTION_DAYS = 7
+
+# Задержка фактической постановки напоминания в очередь относительно
+# запланированного времени (сек)
+REMINDER_LAG = LatencyStats()
+# Как часто печатать задержку напоминаний и счетчики рассылки (сек)
+REMINDER_STATS_INTERVAL = 60 * 60
+
+
+class ReminderStatsReporter:
+    """
+    Печатает статистику напоминаний в обоих режимах планировщика:
+    очередь рассылки, если она не пуста, и раз в
+    REMINDER_STATS_INTERVAL задержку напоминаний и счетчики рассылки
+    """
+
+    def __init__(self, dispatcher: BroadcastDispatcher):
+        self.dispatcher = dispatcher
+        self._reported_at = monotonic()
+
+    def report(self) -> None:
+        if monotonic() - self._reported_at >= REMINDER_STATS_INTERVAL:
+            self._reported_at = monotonic()
+            print(
+                f"Задержка напоминаний: {REMINDER_LAG.as_dict()}, "
+                f"рассылка: {self.dispatcher.stats()}"
+            )
+        elif self.dispatcher.queue_depth:
+            print(f"Очередь рассылки: {self.dispatcher.stats()}")
 
 
 async def send_morning_reminder(
@@ -12,18 +67,18 @@ async def send_morning_reminder(
     session_maker,
     goal
 ):
-    """Отправляет утреннее напоминание о цели"""
-    try:
-        await bot.send_message(
-            goal.user_id,
-            f"☀️ <b>Доброе утро! Твоя топ-цель на сегодня:</b>\n\n"
-            f"🎯 {goal.goal_text}\n"
-            f"🏁 Результат: {goal.result_text}\n\n"
-            f"Удачи! Ты справишься.",
-            parse_mode="HTML"
-        )
-    except Exception as e:
-        print(f"Ошибка отправки напоминания пользователю {goal.user_id}: {e}")
+    """
+    Отправляет утреннее напоминание о цели.
+    Ошибки отправки обрабатывает и считает BroadcastDispatcher.
+    """
+    await bot.send_message(
+        goal.user_id,
+        f"☀️ <b>Доброе утро! Твоя топ-цель на сегодня:</b>\n\n"
+        f"🎯 {goal.goal_text}\n"
+        f"🏁 Результат: {goal.result_text}\n\n"
+        f"Удачи! Ты справишься.",
+        parse_mode="HTML"
+    )
 
 
 async def send_evening_check(
@@ -31,82 +86,322 @@ async def send_evening_check(
     session_maker,
     goal
 ):
-    """Отправляет вечерний чек-ин о выполнении цели"""
-    try:
-        kb_done = get_goal_check_keyboard(goal.id)
-        await bot.send_message(
+    """
+    Отправляет вечерний чек-ин о выполнении цели.
+    Ошибки отправки обрабатывает и считает BroadcastDispatcher.
+    """
+    kb_done = get_goal_check_keyboard(goal.id)
+    await bot.send_message(
+        goal.user_id,
+        f"🌙 <b>Вечерний чек-ин. Как успехи с топ-целью?</b>\n\n"
+        f"🎯 {goal.goal_text}\n"
+        f"🏁 Результат: {goal.result_text}",
+        reply_markup=kb_done,
+        parse_mode="HTML"
+    )
+
+
+REMINDER_SENDERS = {
+    'morning': send_morning_reminder,
+    'evening': send_evening_check,
+}
+
+
+async def deliver_reminder(
+    bot: Bot,
+    session_maker,
+    reminder_type: str,
+    local_date,
+    goal
+):
+    """
+    Отправляет напоминание и подтверждает доставку в sent_reminders.
+    Без подтверждения аренда истечет и напоминание отправят снова.
+    """
+    await REMINDER_SENDERS[reminder_type](bot, session_maker, goal)
+    await ReminderRepository(session_maker).mark_sent(
+        goal.user_id, reminder_type, local_date, utc_now()
+    )
+
+
+def reminder_lease_until(now: datetime) -> datetime:
+    """До какого времени отправка напоминания закреплена за нами"""
+    return now + timedelta(seconds=REMINDER_LEASE_SECONDS)
+
+
+def queue_reminders(
+    bot: Bot,
+    dispatcher: BroadcastDispatcher,
+    session_maker,
+    reminders
+) -> None:
+    """Ставит напоминания (goal, reminder_type, local_date) в рассылку"""
+    for goal, reminder_type, local_date in reminders:
+        dispatcher.submit(
             goal.user_id,
-            f"🌙 <b>Вечерний чек-ин. Как успехи с топ-целью?</b>\n\n"
-            f"🎯 {goal.goal_text}\n"
-            f"🏁 Результат: {goal.result_text}",
-            reply_markup=kb_done,
-            parse_mode="HTML"
+            deliver_reminder,
+            bot,
+            session_maker,
+            reminder_type,
+            local_date,
+            goal
+        )
+
+
+async def resend_expired_reminders(
+    bot: Bot,
+    dispatcher: BroadcastDispatcher,
+    session_maker,
+    now: datetime
+) -> None:
+    """
+    Повторно ставит в рассылку напоминания, доставка которых не была
+    подтверждена до конца аренды (например, бот упал во время
+    отправки или на другом экземпляре)
+    """
+    reminder_repo = ReminderRepository(session_maker)
+    while True:
+        reminders = await reminder_repo.claim_expired_leases(
+            now,
+            reminder_lease_until(now),
+            REMINDER_MAX_ATTEMPTS,
+            REMINDER_CLAIM_BATCH
         )
-    except Exception as e:
-        print(f"Ошибка отправки опроса пользователю {goal.user_id}: {e}")
+        if reminders:
+            print(f"Повторная отправка напоминаний: {len(reminders)}")
+        queue_reminders(bot, dispatcher, session_maker, reminders)
+        if len(reminders) < REMINDER_CLAIM_BATCH:
+            break
+
 
+def get_reminder_times(user_settings) -> dict[str, time]:
+    """Время напоминаний пользователя с учетом значений по умолчанию"""
+    return {
+        'morning': (
+            user_settings and user_settings.morning_time
+        ) or DEFAULT_REMINDER_TIMES['morning'],
+        'evening': (
+            user_settings and user_settings.evening_time
+        ) or DEFAULT_REMINDER_TIMES['evening'],
+    }
 
-async def scheduler_loop(bot: Bot, session_maker):
+
+def get_next_reminder(user_settings, after: datetime) -> tuple[datetime, str]:
+    """
+    Вычисляет ближайшее напоминание пользователя строго после `after`.
+
+    Args:
+        user_settings: Объект UserSettings или None
+        after: Время UTC без tzinfo
+
+    Returns:
+        Tuple (fire_at, reminder_type), fire_at - время UTC без tzinfo
+    """
+    tz = get_user_timezone(user_settings)
+    local_date = utc_to_local(tz, after).date()
+    candidates = sorted(
+        (local_to_utc(tz, local_date + timedelta(days=days), reminder_time),
+         reminder_type)
+        for days in (0, 1)
+        for reminder_type, reminder_time
+        in get_reminder_times(user_settings).items()
+    )
+    return next(
+        (fire_at, reminder_type)
+        for fire_at, reminder_type in candidates
+        if fire_at > after
+    )
+
+
+class ReminderSchedule:
+    """
+    Поддерживает user_settings.next_fire_at в актуальном состоянии
+    при изменении целей и настроек пользователя.
+    """
+
+    def __init__(self, session_maker):
+        self.session_maker = session_maker
+
+    async def schedule_user(self, user_id: int, user_settings=None) -> None:
+        """Вычисляет и сохраняет ближайшее напоминание пользователя"""
+        next_fire_at, reminder_type = get_next_reminder(
+            user_settings,
+            utc_now()
+        )
+        await UserRepository(self.session_maker).set_next_reminder(
+            user_id,
+            next_fire_at,
+            reminder_type
+        )
+
+    async def schedule_missing(self) -> None:
+        """Планирует напоминания для пользователей с целями без расписания"""
+        user_repo = UserRepository(self.session_maker)
+        since_date = datetime.now() - timedelta(days=1)
+        user_ids = await user_repo.get_users_without_schedule(since_date)
+        settings = await user_repo.get_settings_for_users(user_ids)
+        for user_id in user_ids:
+            await self.schedule_user(user_id, settings.get(user_id))
+
+    async def on_goal_added(self, goal) -> None:
+        user_settings = await UserRepository(
+            self.session_maker
+        ).get_user_settings(goal.user_id)
+        if user_settings is None or user_settings.next_fire_at is None:
+            await self.schedule_user(goal.user_id, user_settings)
+
+    async def on_user_settings_changed(self, user_id: int) -> None:
+        user_settings = await UserRepository(
+            self.session_maker
+        ).get_user_settings(user_id)
+        if user_settings and user_settings.next_fire_at is not None:
+            await self.schedule_user(user_id, user_settings)
+
+
+def plan_reminders(due_settings, goals, now: datetime):
+    """
+    Определяет, какие напоминания отправить пользователям, у которых
+    наступило next_fire_at, и на когда перенести next_fire_at.
+    Пропущенные тики догоняются: напоминание отправляется, если
+    опоздание не больше REMINDER_MAX_LATENESS_SECONDS.
+    Если активных целей больше нет, next_fire_at сбрасывается.
+
+    Returns:
+        Tuple (schedule, reminders):
+        schedule - {user_id: (next_fire_at, reminder_type)}
+        reminders - [(goal, reminder_type, local_date)]
+    """
+    goals_by_user = {}
+    for goal in goals:
+        goals_by_user.setdefault(goal.user_id, []).append(goal)
+
+    schedule = {}
+    reminders = []
+    for user_settings in due_settings:
+        user_id = user_settings.user_id
+        tz = get_user_timezone(user_settings)
+        user_goals = goals_by_user.get(user_id, [])
+        local_date = utc_to_local(tz, user_settings.next_fire_at).date()
+
+        lateness = (now - user_settings.next_fire_at).total_seconds()
+        if (
+            user_settings.next_reminder_type in REMINDER_SENDERS
+            and lateness <= REMINDER_MAX_LATENESS_SECONDS
+        ):
+            REMINDER_LAG.observe(lateness)
+            reminders.extend(
+                (goal, user_settings.next_reminder_type, local_date)
+                for goal in user_goals
+                if goal.target_date.date() == local_date
+            )
+
+        next_fire_at, reminder_type = get_next_reminder(user_settings, now)
+        next_local_date = utc_to_local(tz, next_fire_at).date()
+        if not any(
+            goal.target_date.date() >= next_local_date for goal in user_goals
+        ):
+            next_fire_at, reminder_type = None, None
+        schedule[user_id] = (next_fire_at, reminder_type)
+
+    return schedule, reminders
+
+
+async def process_due_reminders(
+    bot: Bot,
+    dispatcher: BroadcastDispatcher,
+    session_maker,
+    now: datetime
+):
+    """
+    Забирает пачками пользователей, у которых наступило next_fire_at,
+    и ставит их напоминания в очередь рассылки.
+
+    Пачки блокируются через FOR UPDATE SKIP LOCKED, а напоминания
+    арендуются в sent_reminders до подтверждения доставки, поэтому
+    несколько экземпляров бота делят рассылку без повторов, а
+    недоставленные напоминания отправляются снова.
+    """
+    reminder_repo = ReminderRepository(session_maker)
+    while True:
+        claimed, reminders = await reminder_repo.claim_due_reminders(
+            now,
+            REMINDER_CLAIM_BATCH,
+            lambda due_settings, goals: plan_reminders(
+                due_settings, goals, now
+            ),
+            reminder_lease_until(now),
+            REMINDER_MAX_ATTEMPTS
+        )
+        queue_reminders(bot, dispatcher, session_maker, reminders)
+        if claimed < REMINDER_CLAIM_BATCH:
+            break
+
+
+def seconds_to_next_minute() -> float:
+    """Секунды до начала следующей минуты по настенным часам"""
+    now = utc_now()
+    return 60 - now.second - now.microsecond / 1_000_000
+
+
+async def scheduler_loop(
+    bot: Bot,
+    session_maker,
+    dispatcher: BroadcastDispatcher
+):
     """
     Основной цикл планировщика напоминаний.
-    Проверяет время для каждого пользователя в его часовом поясе
-    и отправляет напоминания в 9:00 и 21:00 по местному времени.
+    Тики выровнены по началу минуты. На каждом тике выбираются по
+    индексу пользователи, у которых наступило время напоминания
+    (next_fire_at <= now), включая пропущенные из-за долгого тика,
+    и напоминания ставятся в очередь рассылки.
     """
-    # Словарь для отслеживания отправленных напоминаний
-    # Ключ: (user_id, reminder_type), значение: дата последней отправки
-    sent_reminders = {}
+    overruns = 0
+    stats = ReminderStatsReporter(dispatcher)
+    while True:
+        tick_started = monotonic()
+        try:
+            now = utc_now()
+            await process_due_reminders(bot, dispatcher, session_maker, now)
+            await resend_expired_reminders(
+                bot, dispatcher, session_maker, now
+            )
+        except Exception as e:
+            print(f"Ошибка планировщика напоминаний: {e}")
 
+        tick_duration = monotonic() - tick_started
+        if tick_duration > 60:
+            overruns += 1
+            print(
+                f"Тик планировщика длился {tick_duration:.1f} с "
+                f"(перегрузок: {overruns}), "
+                f"задержка напоминаний: {REMINDER_LAG.as_dict()}"
+            )
+        stats.report()
+
+        # asyncio.sleep отсчитывает по монотонным часам, поэтому
+        # переводы системного времени не сбивают цикл
+        await asyncio.sleep(seconds_to_next_minute())
+
+
+async def cleanup_loop(session_maker):
+    """
+    Раз в сутки удаляет устаревшие строки: журнал отправленных
+    напоминаний, пользователей без предстоящих целей и истекшие
+    ответы кэша LLM.
+    """
     while True:
-        # Получаем всех пользователей, у которых есть цели
-        # Для пользователей без часового пояса будет использоваться UTC+5
-        user_repo = UserRepository(session_maker)
-        users_with_goals = await user_repo.get_all_users_with_goals()
-
-        for user_settings in users_with_goals:
-            user_id = user_settings.user_id
-            from services.timezone_service import get_user_local_time
-            user_time = get_user_local_time(user_settings)
-
-            # Используем дату пользователя для проверки
-            user_date = user_time.date()
-
-            # Проверяем утреннее напоминание (09:00)
-            if is_time_for_reminder(user_settings, 9):
-                reminder_key = (user_id, 'morning')
-                if sent_reminders.get(reminder_key) != user_date:
-                    # Получаем активные цели пользователя на сегодня
-                    goal_repo = GoalRepository(session_maker)
-                    goals = await goal_repo.get_active_goals_for_date(user_time)
-                    for goal in goals:
-                        if goal.user_id == user_id:
-                            await send_morning_reminder(
-                                bot,
-                                session_maker,
-                                goal
-                            )
-                    sent_reminders[reminder_key] = user_date
-
-            # Проверяем вечерний чек-ин (21:00)
-            if is_time_for_reminder(user_settings, 21):
-                reminder_key = (user_id, 'evening')
-                if sent_reminders.get(reminder_key) != user_date:
-                    goal_repo = GoalRepository(session_maker)
-                    goals = await goal_repo.get_active_goals_for_date(user_time)
-                    for goal in goals:
-                        if goal.user_id == user_id:
-                            await send_evening_check(
-                                bot,
-                                session_maker,
-                                goal
-                            )
-                    sent_reminders[reminder_key] = user_date
-
-        # Очищаем старые записи (старше 1 дня)
-        current_date = datetime.now().date()
-        sent_reminders = {
-            k: v for k, v in sent_reminders.items()
-            if v == current_date
-        }
-
-        # Ждем 60 секунд до следующей проверки
-        await asyncio.sleep(60)
+        try:
+            now = utc_now()
+            await ReminderRepository(session_maker).delete_sent_before(
+                now.date() - timedelta(days=SENT_REMINDERS_RETENTION_DAYS)
+            )
+            await GoalRepository(session_maker).delete_inactive_users(
+                datetime.combine(now.date() - timedelta(days=1), time.min)
+            )
+            await LLMCacheRepository(session_maker).delete_expired(
+                datetime.now()
+            )
+            print(f"Кэш LLM: {get_llm_cache().stats()}")
+        except Exception as e:
+            print(f"Ошибка очистки устаревших данных: {e}")
+        await asyncio.sleep(24 * 60 * 60)
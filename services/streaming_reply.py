@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from config import STREAM_EDIT_INTERVAL_SECONDS
+
+# Лимит длины текста сообщения Telegram
+MAX_MESSAGE_LENGTH = 4096
+CURSOR = " ▌"
+
+
+class StreamingReply:
+    """
+    Показывает потоковый ответ LLM в одном сообщении: заглушка
+    («Секунду...») редактируется по мере прихода текста.
+
+    Промежуточные правки - без разметки (незакрытые теги и звездочки
+    сломали бы парсинг) и не чаще раза в `interval` секунд, чтобы не
+    упереться в лимиты Telegram на редактирование. Финальная правка
+    применяет разметку и клавиатуру.
+    """
+
+    def __init__(
+        self,
+        message,
+        interval: float = STREAM_EDIT_INTERVAL_SECONDS
+    ):
+        self.message = message
+        self.interval = interval
+        self._edited_at = time.monotonic()
+        self._shown = message.text
+
+        self.edits = 0
+
+    async def update(self, text: str) -> None:
+        """Показывает текст на данный момент, если пора"""
+        if time.monotonic() - self._edited_at < self.interval:
+            return
+        text = text[:MAX_MESSAGE_LENGTH - len(CURSOR)] + CURSOR
+        if text == self._shown:
+            return
+        await self._edit(text)
+
+    async def finish(
+        self,
+        text: str,
+        parse_mode: str | None = None,
+        reply_markup=None
+    ) -> None:
+        """Финальный текст с разметкой и клавиатурой"""
+        text = text[:MAX_MESSAGE_LENGTH]
+        # Финальная правка тоже соблюдает интервал между правками
+        delay = self._edited_at + self.interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            edited = await self._edit_final(text, parse_mode, reply_markup)
+        except TelegramRetryAfter as e:
+            # Финальную правку пропускать нельзя - ждем и повторяем раз
+            await asyncio.sleep(e.retry_after)
+            edited = await self._edit_final(text, parse_mode, reply_markup)
+        if edited:
+            self.edits += 1
+
+    async def _edit_final(self, text: str, parse_mode, reply_markup) -> bool:
+        try:
+            await self.message.edit_text(
+                text,
+                parse_mode=parse_mode,
+                reply_markup=reply_markup
+            )
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                return False
+            # Модель вернула некорректную разметку - показываем как есть
+            await self.message.edit_text(text, reply_markup=reply_markup)
+        return True
+
+    async def _edit(self, text: str) -> None:
+        try:
+            await self.message.edit_text(text)
+            self._shown = text
+            self.edits += 1
+        except TelegramRetryAfter as e:
+            # Пропускаем правки, пока Telegram не разрешит снова
+            self._edited_at = time.monotonic() + e.retry_after
+            return
+        except TelegramBadRequest as e:
+            print(f"Ошибка обновления потокового ответа: {e}")
+        self._edited_at = time.monotonic()
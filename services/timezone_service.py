@@ -1,8 +1,78 @@
-from datetime import datetime
+import bisect
+from datetime import datetime, date, time, timedelta, tzinfo
+from typing import NamedTuple
 import pytz
 
-# Дефолтный часовой пояс для пользователей без установленного часового пояса
-DEFAULT_TIMEZONE = 'Asia/Yekaterinburg'  # UTC+5
+from config import DEFAULT_TIMEZONE
+
+# Кэш объектов часовых поясов по названию (включая неизвестные)
+_timezone_cache: dict[str | None, tzinfo] = {}
+
+
+class OffsetPeriod(NamedTuple):
+    """Интервал (UTC), в котором смещение часового пояса постоянно"""
+    tzinfo: tzinfo
+    offset: timedelta
+    valid_from: datetime
+    valid_until: datetime
+
+
+# Текущий интервал постоянного смещения для каждого часового пояса
+_offset_periods: dict[str, OffsetPeriod] = {}
+
+
+def get_timezone(timezone_name: str | None):
+    """
+    Получает объект часового пояса по названию (с кэшированием).
+    Если название пустое или неизвестное, возвращает дефолтный (UTC+5).
+    """
+    tz = _timezone_cache.get(timezone_name)
+    if tz is not None:
+        return tz
+
+    if not timezone_name:
+        tz = pytz.timezone(DEFAULT_TIMEZONE)
+    else:
+        try:
+            tz = pytz.timezone(timezone_name)
+        except pytz.exceptions.UnknownTimeZoneError:
+            msg = (f"Неизвестный часовой пояс: {timezone_name}, "
+                   f"используется дефолтный {DEFAULT_TIMEZONE}")
+            print(msg)
+            tz = pytz.timezone(DEFAULT_TIMEZONE)
+
+    _timezone_cache[timezone_name] = tz
+    return tz
+
+
+def get_offset_period(tz, utc_dt: datetime) -> OffsetPeriod:
+    """
+    Возвращает интервал постоянного смещения часового пояса,
+    содержащий utc_dt (UTC без tzinfo). Интервал берется из таблицы
+    переходов pytz и кэшируется до следующего перехода.
+    """
+    period = _offset_periods.get(tz.zone)
+    if period and period.valid_from <= utc_dt < period.valid_until:
+        return period
+
+    local_dt = pytz.UTC.localize(utc_dt).astimezone(tz)
+    valid_from, valid_until = datetime.min, datetime.max
+    transitions = getattr(tz, '_utc_transition_times', None)
+    if transitions:
+        index = bisect.bisect_right(transitions, utc_dt)
+        if index > 0:
+            valid_from = transitions[index - 1]
+        if index < len(transitions):
+            valid_until = transitions[index]
+
+    period = OffsetPeriod(
+        local_dt.tzinfo,
+        local_dt.utcoffset(),
+        valid_from,
+        valid_until
+    )
+    _offset_periods[tz.zone] = period
+    return period
 
 
 def get_user_timezone(user_settings):
@@ -17,16 +87,7 @@ def get_user_timezone(user_settings):
         pytz.timezone объект (дефолтный UTC+5, если часовой пояс
         не установлен)
     """
-    if not user_settings or not user_settings.timezone:
-        return pytz.timezone(DEFAULT_TIMEZONE)
-
-    try:
-        return pytz.timezone(user_settings.timezone)
-    except pytz.exceptions.UnknownTimeZoneError:
-        msg = (f"Неизвестный часовой пояс: {user_settings.timezone}, "
-               f"используется дефолтный {DEFAULT_TIMEZONE}")
-        print(msg)
-        return pytz.timezone(DEFAULT_TIMEZONE)
+    return get_timezone(user_settings.timezone if user_settings else None)
 
 
 def get_user_local_time(user_settings) -> datetime:
@@ -41,26 +102,162 @@ def get_user_local_time(user_settings) -> datetime:
         datetime объект в часовом поясе пользователя (дефолтный UTC+5,
         если не установлен)
     """
-    user_tz = get_user_timezone(user_settings)
-    return datetime.now(user_tz)
+    return utc_to_local(get_user_timezone(user_settings), utc_now())
 
 
-def is_time_for_reminder(user_settings, hour: int) -> bool:
+def get_local_time(timezone_name: str | None) -> datetime:
+    """Текущее локальное время в часовом поясе с указанным названием"""
+    return utc_to_local(get_timezone(timezone_name), utc_now())
+
+
+def utc_now() -> datetime:
+    """Текущее время UTC без tzinfo (как хранится в БД)"""
+    return datetime.now(pytz.UTC).replace(tzinfo=None)
+
+
+def local_to_utc(tz, local_date: date, local_time: time) -> datetime:
+    """
+    Переводит локальные дату и время в UTC без tzinfo с учетом
+    перехода на летнее время: несуществующее время сдвигается вперед.
     """
-    Проверяет, наступило ли время для напоминания в часовом поясе
-    пользователя. Если часовой пояс не установлен, используется
-    дефолтный (UTC+5).
+    local_dt = tz.normalize(
+        tz.localize(datetime.combine(local_date, local_time))
+    )
+    return local_dt.astimezone(pytz.UTC).replace(tzinfo=None)
 
-    Args:
-        user_settings: Объект UserSettings или None
-        hour: Час для проверки (например, 9 для 9:00)
+
+def utc_to_local(tz, utc_dt: datetime) -> datetime:
+    """
+    Переводит время UTC без tzinfo в локальное время часового пояса.
+    До ближайшего перехода на летнее/зимнее время это просто
+    прибавление закэшированного смещения.
+    """
+    period = get_offset_period(tz, utc_dt)
+    return (utc_dt + period.offset).replace(tzinfo=period.tzinfo)
+
+
+def parse_time_string(time_str: str) -> tuple[time | None, str]:
+    """
+    Парсит время в формате "HH:MM" или "H:MM".
 
     Returns:
-        True, если текущее время пользователя соответствует указанному
-        часу и минуте (00:00)
+        Tuple (time, error_message)
     """
-    user_time = get_user_local_time(user_settings)
-    return user_time.hour == hour and user_time.minute == 0
+    try:
+        hour, minute = (int(part) for part in time_str.strip().split(':'))
+    except ValueError:
+        return None, (
+            "Неверный формат времени. "
+            "Используй формат HH:MM (например, 14:30)"
+        )
+
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return None, (
+            "Неверное время. Час должен быть от 0 до 23, "
+            "минуты от 0 до 59"
+        )
+    return time(hour, minute), ""
+
+
+# Пояс с :30 или :45 выбирается, только если присланное время
+# отличается от его времени не больше чем на столько минут. Иначе
+# смещение округляется до часа: время часто пишут округленным
+OFFSET_SNAP_MINUTES = 5
+
+
+class TimezoneOffsetIndex:
+    """
+    Индекс "смещение от UTC в минутах -> часовые пояса".
+
+    Строится один раз по pytz.all_timezones (сначала
+    pytz.common_timezones) и автоматически перестраивается после
+    ближайшего перехода на летнее/зимнее время в любом из поясов.
+    """
+
+    def __init__(self):
+        self._zones_by_offset: dict[int, list[str]] = {}
+        self._offsets: dict[str, int] = {}
+        self._valid_until: datetime | None = None
+
+    def _build(self, now: datetime) -> None:
+        zones_by_offset = {}
+        offsets = {}
+        valid_until = now + timedelta(days=30)
+        common = set(pytz.common_timezones)
+        ordered = pytz.common_timezones + [
+            tz_name for tz_name in pytz.all_timezones
+            if tz_name not in common
+        ]
+        for tz_name in ordered:
+            try:
+                period = get_offset_period(pytz.timezone(tz_name), now)
+            except Exception:
+                continue
+            offset_minutes = int(period.offset.total_seconds() // 60)
+            offsets[tz_name] = offset_minutes
+            zones_by_offset.setdefault(offset_minutes, []).append(tz_name)
+            valid_until = min(valid_until, period.valid_until)
+
+        self._zones_by_offset = zones_by_offset
+        self._offsets = offsets
+        self._valid_until = valid_until
+
+    def _ensure_fresh(self) -> None:
+        now = utc_now()
+        if self._valid_until is None or now >= self._valid_until:
+            self._build(now)
+
+    def offset_of(self, tz_name: str) -> int | None:
+        """Текущее смещение часового пояса в минутах"""
+        self._ensure_fresh()
+        return self._offsets.get(tz_name)
+
+    def snap(
+        self,
+        diff_minutes: int,
+        tolerance: int = OFFSET_SNAP_MINUTES
+    ) -> int:
+        """
+        Смещение существующего пояса для разницы между присланным
+        временем и UTC.
+        """
+        self._ensure_fresh()
+        nearest = min(
+            self._zones_by_offset,
+            key=lambda offset: abs(offset - diff_minutes)
+        )
+        if abs(nearest - diff_minutes) <= tolerance:
+            return nearest
+        whole_hour = round(diff_minutes / 60) * 60
+        if whole_hour in self._zones_by_offset:
+            return whole_hour
+        return nearest
+
+    def find(
+        self,
+        offset_minutes: int,
+        preferred: list[str] | None = None
+    ) -> str | None:
+        """
+        Возвращает часовой пояс с указанным смещением.
+        Пояса из preferred проверяются первыми.
+        """
+        self._ensure_fresh()
+        for tz_name in preferred or ():
+            if self._offsets.get(tz_name) == offset_minutes:
+                return tz_name
+        zones = self._zones_by_offset.get(offset_minutes)
+        return zones[0] if zones else None
+
+
+timezone_offset_index = TimezoneOffsetIndex()
+
+
+def format_utc_offset(offset_minutes: int) -> str:
+    """Форматирует смещение в минутах, например 330 -> UTC+05:30"""
+    sign = "+" if offset_minutes >= 0 else "-"
+    hours, minutes = divmod(abs(offset_minutes), 60)
+    return f"UTC{sign}{hours:02d}:{minutes:02d}"
 
 
 def detect_timezone_from_time(
@@ -80,36 +277,18 @@ def detect_timezone_from_time(
         timezone_name - название часового пояса или None
         error_message - сообщение об ошибке или пустая строка
     """
+    user_time, error_msg = parse_time_string(user_time_str)
+    if user_time is None:
+        return None, error_msg
+
     try:
-        # Парсим время пользователя
-        time_parts = user_time_str.strip().split(':')
-        if len(time_parts) != 2:
-            error_msg = (
-                "Неверный формат времени. "
-                "Используй формат HH:MM (например, 14:30)"
-            )
-            return None, error_msg
-
-        user_hour = int(time_parts[0])
-        user_minute = int(time_parts[1])
-
-        if not (0 <= user_hour <= 23 and 0 <= user_minute <= 59):
-            return None, (
-                "Неверное время. Час должен быть от 0 до 23, "
-                "минуты от 0 до 59"
-            )
-
-        # Получаем текущее UTC время
-        utc_now = datetime.now(pytz.UTC)
-        utc_hour = utc_now.hour
-        utc_minute = utc_now.minute
-
-        # Вычисляем разницу в часах и минутах
-        user_total_minutes = user_hour * 60 + user_minute
-        utc_total_minutes = utc_hour * 60 + utc_minute
+        now = utc_now()
 
         # Вычисляем смещение (может быть отрицательным)
-        diff_minutes = user_total_minutes - utc_total_minutes
+        diff_minutes = (
+            user_time.hour * 60 + user_time.minute
+            - (now.hour * 60 + now.minute)
+        )
 
         # Учитываем, что разница может быть через полночь
         if diff_minutes > 12 * 60:
@@ -117,51 +296,23 @@ def detect_timezone_from_time(
         elif diff_minutes < -12 * 60:
             diff_minutes += 24 * 60
 
-        # Конвертируем в часы (округление)
-        offset_hours = round(diff_minutes / 60)
+        # Ближайшее существующее смещение (целый час, :30 или :45)
+        offset_minutes = timezone_offset_index.snap(diff_minutes)
 
-        # Находим подходящий часовой пояс
         # Сначала проверяем популярные, если переданы
-        if popular_timezones:
-            for tz_name, _ in popular_timezones:
-                try:
-                    tz = pytz.timezone(tz_name)
-                    tz_now = datetime.now(tz)
-                    tz_offset = tz_now.utcoffset().total_seconds() / 3600
-                    if abs(tz_offset - offset_hours) < 0.5:
-                        return tz_name, ""
-                except Exception:
-                    continue
-
-        # Если не нашли в популярных, ищем во всех доступных
-        matching_timezones = []
-        for tz_name in pytz.all_timezones:
-            try:
-                tz = pytz.timezone(tz_name)
-                tz_now = datetime.now(tz)
-                tz_offset = tz_now.utcoffset().total_seconds() / 3600
-                if abs(tz_offset - offset_hours) < 0.5:
-                    matching_timezones.append(tz_name)
-            except Exception:
-                continue
-
-        if matching_timezones:
-            # Выбираем первый подходящий
-            return matching_timezones[0], ""
+        tz_name = timezone_offset_index.find(
+            offset_minutes,
+            [name for name, _ in popular_timezones or ()]
+        )
+        if tz_name:
+            return tz_name, ""
 
-        # Если ничего не нашли, возвращаем ошибку
         error_msg = (
             f"Не удалось определить часовой пояс. "
-            f"Вычисленное смещение: UTC{offset_hours:+d}. "
+            f"Вычисленное смещение: {format_utc_offset(offset_minutes)}. "
             f"Попробуй выбрать часовой пояс вручную."
         )
         return None, error_msg
 
-    except ValueError:
-        error_msg = (
-            "Неверный формат времени. "
-            "Используй формат HH:MM (например, 14:30)"
-        )
-        return None, error_msg
     except Exception as e:
         return None, f"Ошибка при определении часового пояса: {str(e)}"
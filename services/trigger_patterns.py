@@ -0,0 +1,201 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import numpy as np
+
+from repositories import (
+    JournalRepository,
+    format_rollup_key,
+    split_rollup_key
+)
+
+# Неделя анализа и предыдущая неделя для сравнения
+PATTERN_WINDOW_DAYS = 7
+PAIR_DIMENSIONS = ['emotion+location', 'emotion+company', 'location+company']
+# Пара учитывается, если встретилась хотя бы столько раз
+MIN_PAIR_COUNT = 2
+TOP_COUNT = 3
+
+# (название, первый час, последний час) - блоки по 6 часов
+DAY_PERIODS = [
+    ('ночь', 0, 5),
+    ('утро', 6, 11),
+    ('день', 12, 17),
+    ('вечер', 18, 23),
+]
+PERIOD_ADVERBS = ['ночью', 'утром', 'днем', 'вечером']
+WEEKDAY_ADVERBS = [
+    'по понедельникам', 'по вторникам', 'по средам', 'по четвергам',
+    'по пятницам', 'по субботам', 'по воскресеньям',
+]
+
+
+@dataclass
+class TriggerPatterns:
+    """Результаты локального анализа записей за неделю"""
+    total: int = 0
+    previous_total: int = 0
+    # [(сочетание, сколько раз)]
+    top_combinations: list = field(default_factory=list)
+    # [(пара, во сколько раз чаще случайного, сколько раз)]
+    lifts: list = field(default_factory=list)
+    # Записи по дням недели (строки) и часам (столбцы)
+    heatmap: np.ndarray = field(
+        default_factory=lambda: np.zeros((7, 24), dtype=np.int64)
+    )
+    # [(эмоция, изменение к прошлой неделе)]
+    emotion_deltas: list = field(default_factory=list)
+
+    @property
+    def peak_weekday(self) -> int | None:
+        by_weekday = self.heatmap.sum(axis=1)
+        return int(by_weekday.argmax()) if by_weekday.any() else None
+
+    @property
+    def peak_period(self) -> int | None:
+        by_period = self.heatmap.sum(axis=0).reshape(len(DAY_PERIODS), -1)
+        by_period = by_period.sum(axis=1)
+        return int(by_period.argmax()) if by_period.any() else None
+
+
+def _sum_by_key(rows) -> dict:
+    """{(dimension, key): count} по строкам (day, dimension, key, count)"""
+    totals = {}
+    for _, dimension, key, count in rows:
+        totals[dimension, key] = totals.get((dimension, key), 0) + count
+    return totals
+
+
+def _pair_lifts(totals: dict, total: int) -> list:
+    """
+    Lift пар: P(a и b) / (P(a) * P(b)). Больше 1 - значения
+    встречаются вместе чаще, чем если бы были независимы.
+    """
+    pairs = [
+        (dimension, key, count)
+        for (dimension, key), count in totals.items()
+        if dimension in PAIR_DIMENSIONS and count >= MIN_PAIR_COUNT
+    ]
+    if not pairs or not total:
+        return []
+    pair_counts = np.array([count for _, _, count in pairs], dtype=float)
+    first = np.empty(len(pairs))
+    second = np.empty(len(pairs))
+    for i, (dimension, key, _) in enumerate(pairs):
+        first_dim, second_dim = dimension.split('+')
+        first_key, second_key = split_rollup_key(dimension, key)
+        first[i] = totals.get((first_dim, first_key), 0)
+        second[i] = totals.get((second_dim, second_key), 0)
+    lifts = pair_counts * total / np.maximum(first * second, 1)
+
+    order = np.argsort(-lifts, kind='stable')[:TOP_COUNT]
+    return [
+        (
+            format_rollup_key(pairs[i][0], pairs[i][1]),
+            round(float(lifts[i]), 1),
+            pairs[i][2]
+        )
+        for i in order
+        if lifts[i] > 1
+    ]
+
+
+def compute_trigger_patterns(rows, today: date) -> TriggerPatterns:
+    """
+    Считает закономерности по дневным счетчикам за две недели:
+    строки (day, dimension, key, count) из trigger_rollups.
+    """
+    week_start = today - timedelta(days=PATTERN_WINDOW_DAYS - 1)
+    current = [row for row in rows if row[0] >= week_start]
+    previous = [row for row in rows if row[0] < week_start]
+
+    patterns = TriggerPatterns()
+    hours = [row for row in current if row[1] == 'hour']
+    if hours:
+        np.add.at(
+            patterns.heatmap,
+            (
+                np.array([day.weekday() for day, _, _, _ in hours]),
+                np.array([int(key) for _, _, key, _ in hours]),
+            ),
+            np.array([count for _, _, _, count in hours])
+        )
+    patterns.total = int(patterns.heatmap.sum())
+    patterns.previous_total = sum(
+        count for _, dimension, _, count in previous if dimension == 'hour'
+    )
+
+    totals = _sum_by_key(current)
+    patterns.top_combinations = sorted(
+        (
+            (format_rollup_key(dimension, key), count)
+            for (dimension, key), count in totals.items()
+            if dimension == 'emotion+location+company'
+        ),
+        key=lambda item: -item[1]
+    )[:TOP_COUNT]
+    patterns.lifts = _pair_lifts(totals, patterns.total)
+
+    previous_totals = _sum_by_key(previous)
+    emotions = sorted({
+        key for dimension, key in [*totals, *previous_totals]
+        if dimension == 'emotion'
+    })
+    if emotions:
+        deltas = (
+            np.array([totals.get(('emotion', e), 0) for e in emotions])
+            - np.array([
+                previous_totals.get(('emotion', e), 0) for e in emotions
+            ])
+        )
+        order = np.argsort(-np.abs(deltas), kind='stable')[:TOP_COUNT]
+        patterns.emotion_deltas = [
+            (emotions[i], int(deltas[i])) for i in order if deltas[i]
+        ]
+    return patterns
+
+
+def format_trigger_patterns(patterns: TriggerPatterns) -> str:
+    """Текст быстрого анализа для пользователя и для промпта LLM"""
+    change = patterns.total - patterns.previous_total
+    lines = [
+        "📊 Быстрый анализ за неделю",
+        f"Записей: {patterns.total} "
+        f"(неделей раньше: {patterns.previous_total}, {change:+d})",
+    ]
+    if patterns.top_combinations:
+        lines.append("Частые сочетания:")
+        lines.extend(
+            f"• {key} ×{count}" for key, count in patterns.top_combinations
+        )
+    if patterns.lifts:
+        lines.append("Триггеры, которые ходят вместе:")
+        lines.extend(
+            f"• {key} - в {lift} раза чаще случайного (×{count})"
+            for key, lift, count in patterns.lifts
+        )
+    if patterns.peak_weekday is not None:
+        lines.append(
+            f"Чаще всего: {WEEKDAY_ADVERBS[patterns.peak_weekday]}, "
+            f"{PERIOD_ADVERBS[patterns.peak_period]}"
+        )
+    if patterns.emotion_deltas:
+        lines.append("К прошлой неделе: " + ", ".join(
+            f"{emotion} {delta:+d}"
+            for emotion, delta in patterns.emotion_deltas
+        ))
+    return "\n".join(lines)
+
+
+async def find_trigger_patterns(
+    session_maker,
+    user_id: int,
+    today: date | None = None
+) -> TriggerPatterns:
+    """Локальный анализ записей пользователя за последние две недели"""
+    today = today or date.today()
+    rows = await JournalRepository(session_maker).get_daily_rollups(
+        user_id,
+        today - timedelta(days=2 * PATTERN_WINDOW_DAYS - 1)
+    )
+    return compute_trigger_patterns(rows, today)
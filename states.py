@@ -21,6 +21,8 @@ class GoalStates(StatesGroup):
 
 
 class SettingsStates(StatesGroup):
-    """Состояния для настройки часового пояса"""
+    """Состояния для настроек пользователя"""
     setting_timezone_by_time = State()
+    setting_morning_time = State()
+    setting_evening_time = State()
 